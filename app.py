@@ -4,10 +4,8 @@ Dashboard Streamlit para monitorar validade de certificados digitais.
 """
 
 import os
-import re
 import time
-import warnings
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from io import BytesIO, StringIO
 
@@ -15,203 +13,120 @@ import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 import plotly.graph_objects as go
-from cryptography.hazmat.primitives.serialization import pkcs12
 
 import database as db
 import email_service as email_svc
+import scanner
 from styles import get_css, render_header, render_metric_card, render_badge, render_action_card
 
-# Suprime warnings de parsing BER/DER da biblioteca cryptography
-warnings.filterwarnings("ignore", message=".*PKCS#12 bundle could not be parsed as DER.*")
-
-# Caminho fixo da pasta de certificados
-CAMINHO_CERTIFICADOS = r"G:\Drives compartilhados\CERTIFICADOS DIGITAIS"
+# Caminho fixo da pasta de certificados (definido em scanner.py)
+CAMINHO_CERTIFICADOS = scanner.CAMINHO_CERTIFICADOS
 
 # Caminho do manual do usuário (HTML)
 PASTA_APP = os.path.dirname(os.path.abspath(__file__))
 CAMINHO_MANUAL_HTML = os.path.join(PASTA_APP, "MANUAL_USUARIO.html")
 
+# Linhas do CSV exibidas na prévia da importação de cadastros
+LINHAS_PREVIA_IMPORTACAO = 100
+
 # Versão do sistema
 VERSAO = "2.1.0"
 
 
-def extrair_dados_nome_arquivo(nome_arquivo: str) -> Optional[dict]:
-    """Extrai código, nome do cliente e senha do nome do arquivo .pfx."""
-    padrao = r'^(\d+)\s*-\s*(.+?)\s+Senha\s+(.+?)\.pfx$'
-    match = re.match(padrao, nome_arquivo, re.IGNORECASE)
-    
-    if match:
-        return {
-            'codigo': match.group(1).strip(),
-            'cliente': match.group(2).strip(),
-            'senha': match.group(3).strip()
-        }
-    return None
+def get_servico_varredura() -> scanner.ServicoVarredura:
+    """Serviço de varredura único do processo (o mesmo do aquecimento em servidor.py)."""
+    return scanner.get_servico_varredura()
 
 
-def ler_certificado(caminho_arquivo: str, senha: str) -> Optional[datetime]:
-    """Abre o arquivo .pfx e retorna a data de vencimento do certificado."""
-    try:
-        with open(caminho_arquivo, 'rb') as f:
-            pfx_data = f.read()
-        
-        private_key, certificate, additional_certs = pkcs12.load_key_and_certificates(
-            pfx_data,
-            senha.encode('utf-8')
-        )
-        
-        if certificate is not None:
-            return certificate.not_valid_after_utc
-        return None
-    except Exception:
-        return None
+def carregar_certificados(caminho_pasta: str) -> Optional[pd.DataFrame]:
+    """
+    Retorna o resultado da última varredura concluída, compartilhado por toda
+    a execução (deve ser chamada uma única vez, em main). Retorna None enquanto
+    a primeira varredura da pasta roda em segundo plano; a varredura é iniciada
+    aqui se a pasta ainda não foi lida.
+    
+    Após reiniciar o servidor, o snapshot da última varredura completa é
+    exibido de imediato enquanto a pasta é lida de novo em segundo plano.
+    
+    Enquanto houver lotes na fila de varredura (fila_varredura.py), a pasta é
+    lida pelos workers e aqui só o resultado salvo é exibido; quando a fila
+    termina, o resultado dos workers é consolidado (a partir do cache).
+    
+    A varredura guarda só os vencimentos absolutos; dias para vencer e status
+    são calculados aqui para a data atual.
+    
+    Se a pasta ainda não estiver acessível (ex.: Google Drive não montado
+    logo após reiniciar), só o snapshot é exibido: a leitura começa quando a
+    pasta aparecer, sem substituir o snapshot por um resultado vazio.
+    """
+    servico = get_servico_varredura()
+    concluida = servico.ultima(caminho_pasta)
+    fila = db.get_progresso_fila(caminho_pasta)
+    acessivel = os.path.isdir(caminho_pasta)
+    
+    if fila["restantes"] and not fila["parada"]:
+        if concluida is None:
+            concluida = servico.restaurar(caminho_pasta)
+    elif concluida is None and servico.falha(caminho_pasta) is None:
+        concluida = servico.restaurar(caminho_pasta)
+        if acessivel:
+            servico.iniciar(caminho_pasta)
+    elif (concluida is not None and concluida.do_snapshot and acessivel
+            and servico.falha(caminho_pasta) is None and not servico.em_andamento(caminho_pasta)):
+        # A pasta ficou acessível depois que o snapshot foi restaurado
+        servico.iniciar(caminho_pasta)
+    elif concluida is not None and fila["concluida_em"] and concluida.iniciada_em < fila["concluida_em"]:
+        # A fila terminou depois da última varredura deste servidor
+        servico.iniciar(caminho_pasta)
+    
+    return scanner.calcular_situacao(concluida.resultado) if concluida else None
 
 
-def calcular_status(dias_para_vencer: int) -> str:
-    """Calcula o status do certificado baseado nos dias para vencer."""
-    if dias_para_vencer < 0:
-        return 'Vencido'
-    elif dias_para_vencer <= 30:
-        return 'Atenção'
-    else:
-        return 'Válido'
+def formatar_idade(instante: float) -> str:
+    """Descreve há quanto tempo ocorreu `instante` (segundos desde a época)."""
+    segundos = max(0, int(time.time() - instante))
+    if segundos < 60:
+        return "há menos de 1 minuto"
+    if segundos < 3600:
+        return f"há {segundos // 60} min"
+    if segundos < 86400:
+        return f"há {segundos // 3600} h"
+    return f"há {segundos // 86400} dia(s)"
 
 
-def processar_certificados_com_progresso(caminho_pasta: str) -> pd.DataFrame:
-    """Processa todos os certificados .pfx de uma pasta com barra de progresso."""
-    dados = []
-    
-    if not os.path.exists(caminho_pasta):
-        return pd.DataFrame(columns=['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status'])
-    
-    try:
-        arquivos = [f for f in os.listdir(caminho_pasta) if f.lower().endswith('.pfx')]
-    except PermissionError:
-        return pd.DataFrame(columns=['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status'])
-    
-    if not arquivos:
-        return pd.DataFrame(columns=['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status'])
-    
-    # Barra de progresso
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i, arquivo in enumerate(arquivos):
-        status_text.text(f"Processando: {arquivo[:50]}...")
-        progress_bar.progress((i + 1) / len(arquivos))
-        
-        caminho_completo = os.path.join(caminho_pasta, arquivo)
-        dados_arquivo = extrair_dados_nome_arquivo(arquivo)
-        
-        if dados_arquivo is None:
-            dados.append({
-                'Código': '?',
-                'Cliente': arquivo,
-                'Vencimento': None,
-                'Dias para Vencer': None,
-                'Status': 'Erro: Nome inválido'
-            })
-            continue
-        
-        data_vencimento = ler_certificado(caminho_completo, dados_arquivo['senha'])
-        
-        if data_vencimento is None:
-            dados.append({
-                'Código': dados_arquivo['codigo'],
-                'Cliente': dados_arquivo['cliente'],
-                'Vencimento': None,
-                'Dias para Vencer': None,
-                'Status': 'Erro na leitura'
-            })
-            continue
-        
-        hoje = datetime.now(timezone.utc)
-        dias_para_vencer = (data_vencimento - hoje).days
-        
-        dados.append({
-            'Código': dados_arquivo['codigo'],
-            'Cliente': dados_arquivo['cliente'],
-            'Vencimento': data_vencimento.strftime('%d/%m/%Y'),
-            'Dias para Vencer': dias_para_vencer,
-            'Status': calcular_status(dias_para_vencer)
-        })
+@st.fragment(run_every=1)
+def acompanhar_varredura(caminho_pasta: str):
+    """Exibe o progresso da varredura em segundo plano e recarrega a página ao terminar."""
+    varredura = get_servico_varredura().em_andamento(caminho_pasta)
     
-    # Limpa barra de progresso
-    progress_bar.empty()
-    status_text.empty()
+    if varredura is None:
+        st.rerun()
     
-    df = pd.DataFrame(dados)
+    if varredura.retomada_de:
+        st.caption(f"Retomando varredura interrompida ({varredura.retomada_de} arquivos já lidos).")
     
-    if not df.empty:
-        df['_ordem'] = df['Dias para Vencer'].apply(
-            lambda x: x if x is not None else float('inf')
+    if varredura.total:
+        st.progress(
+            varredura.feitos / varredura.total,
+            text=f"Processando ({varredura.feitos}/{varredura.total}): {varredura.arquivo_atual[:50]}..."
         )
-        df = df.sort_values('_ordem').drop('_ordem', axis=1)
-        df = df.reset_index(drop=True)
-    
-    return df
+    else:
+        st.progress(0, text="Listando arquivos .pfx...")
 
 
-@st.cache_data
-def processar_certificados(caminho_pasta: str) -> pd.DataFrame:
-    """Processa todos os certificados .pfx de uma pasta (com cache)."""
-    dados = []
-    
-    if not os.path.exists(caminho_pasta):
-        return pd.DataFrame(columns=['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status'])
-    
-    try:
-        arquivos = [f for f in os.listdir(caminho_pasta) if f.lower().endswith('.pfx')]
-    except PermissionError:
-        return pd.DataFrame(columns=['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status'])
-    
-    for arquivo in arquivos:
-        caminho_completo = os.path.join(caminho_pasta, arquivo)
-        dados_arquivo = extrair_dados_nome_arquivo(arquivo)
-        
-        if dados_arquivo is None:
-            dados.append({
-                'Código': '?',
-                'Cliente': arquivo,
-                'Vencimento': None,
-                'Dias para Vencer': None,
-                'Status': 'Erro: Nome inválido'
-            })
-            continue
-        
-        data_vencimento = ler_certificado(caminho_completo, dados_arquivo['senha'])
-        
-        if data_vencimento is None:
-            dados.append({
-                'Código': dados_arquivo['codigo'],
-                'Cliente': dados_arquivo['cliente'],
-                'Vencimento': None,
-                'Dias para Vencer': None,
-                'Status': 'Erro na leitura'
-            })
-            continue
-        
-        hoje = datetime.now(timezone.utc)
-        dias_para_vencer = (data_vencimento - hoje).days
-        
-        dados.append({
-            'Código': dados_arquivo['codigo'],
-            'Cliente': dados_arquivo['cliente'],
-            'Vencimento': data_vencimento.strftime('%d/%m/%Y'),
-            'Dias para Vencer': dias_para_vencer,
-            'Status': calcular_status(dias_para_vencer)
-        })
+@st.fragment(run_every=2)
+def acompanhar_fila(caminho_pasta: str):
+    """Exibe o progresso da fila de varredura e recarrega a página quando ela termina."""
+    fila = db.get_progresso_fila(caminho_pasta)
     
-    df = pd.DataFrame(dados)
-    
-    if not df.empty:
-        df['_ordem'] = df['Dias para Vencer'].apply(
-            lambda x: x if x is not None else float('inf')
-        )
-        df = df.sort_values('_ordem').drop('_ordem', axis=1)
-        df = df.reset_index(drop=True)
+    if not fila["restantes"] or fila["parada"]:
+        st.rerun()
     
-    return df
+    st.progress(
+        fila["concluidos"] / fila["total"],
+        text=f"Fila de varredura: {fila['concluidos']}/{fila['total']} lotes concluídos "
+             f"({fila['workers']} worker(s) ativos)"
+    )
 
 
 def aplicar_estilo(row: pd.Series) -> list:
@@ -224,6 +139,8 @@ def aplicar_estilo(row: pd.Series) -> list:
         return ['background-color: #fff8e1; color: #f57f17'] * len(row)
     elif 'Erro' in status:
         return ['background-color: #fce4ec; color: #c62828'] * len(row)
+    elif status == scanner.STATUS_TIMEOUT:
+        return ['background-color: #eceff1; color: #546e7a'] * len(row)
     else:
         return ['background-color: #e8f5e9; color: #2e7d32'] * len(row)
 
@@ -249,7 +166,7 @@ def exportar_cadastros_csv() -> bytes:
 
 def criar_grafico_vencimentos(df: pd.DataFrame) -> go.Figure:
     """Cria gráfico de barras com certificados por mês de vencimento."""
-    df_validos = df[~df['Status'].str.contains('Erro', na=False)].copy()
+    df_validos = df[df['Vencimento'].notna()].copy()
     
     if df_validos.empty:
         fig = go.Figure()
@@ -298,35 +215,23 @@ def criar_grafico_vencimentos(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def obter_destinatarios_elegiveis(df: pd.DataFrame, dias_limite: int) -> List[Dict[str, Any]]:
+def obter_destinatarios_elegiveis(caminho_pasta: str, dias_limite: int) -> List[Dict[str, Any]]:
     """Obtém lista de destinatários elegíveis para notificação."""
     destinatarios = []
-    clientes_db = {c["codigo"]: c for c in db.get_todos_clientes()}
+    notificados = db.get_clientes_notificados()
     
-    for _, row in df.iterrows():
-        codigo = row['Código']
-        dias = row['Dias para Vencer']
-        status = row['Status']
-        
-        if 'Erro' in status or dias is None:
-            continue
+    for certificado in db.get_certificados_elegiveis(caminho_pasta, dias_limite):
+        codigo = certificado['codigo']
         
-        if dias > dias_limite:
-            continue
-        
-        cliente = clientes_db.get(codigo)
-        if not cliente or not cliente.get('email'):
-            continue
-        
-        if not db.pode_enviar_notificacao(codigo):
+        if codigo in notificados:
             continue
         
         destinatarios.append({
             'codigo': codigo,
-            'cliente': row['Cliente'],
-            'email': cliente['email'],
-            'dias': dias,
-            'vencimento': row['Vencimento']
+            'cliente': certificado['cliente'],
+            'email': certificado['email'],
+            'dias': certificado['dias_para_vencer'],
+            'vencimento': certificado['vencimento'].strftime('%d/%m/%Y')
         })
     
     return destinatarios
@@ -349,14 +254,16 @@ def pagina_manual():
         st.rerun()
 
 
-def pagina_configuracoes():
+def pagina_configuracoes(df: Optional[pd.DataFrame]):
     """Renderiza a página de configurações."""
     configs = db.get_todas_configuracoes()
     tema_escuro = configs.get("tema_escuro", "false") == "true"
     
     st.markdown(render_header("Configurações", "Gerencie as configurações do sistema"), unsafe_allow_html=True)
     
-    tab1, tab2, tab3, tab4 = st.tabs(["📧 Email SMTP", "🔔 Notificações", "📁 Importar/Exportar", "ℹ️ Sobre"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "📧 Email SMTP", "🔔 Notificações", "📁 Importar/Exportar", "📂 Leitura", "ℹ️ Sobre"
+    ])
     
     with tab1:
         st.subheader("Configuração do Servidor SMTP (Gmail)")
@@ -461,10 +368,13 @@ def pagina_configuracoes():
         
         # Botão de enviar com confirmação
         if st.button("📤 Preparar Envio de Notificações", width="stretch"):
-            df = processar_certificados(CAMINHO_CERTIFICADOS)
-            destinatarios = obter_destinatarios_elegiveis(df, dias_notificacao)
+            destinatarios = (
+                obter_destinatarios_elegiveis(CAMINHO_CERTIFICADOS, dias_notificacao) if df is not None else []
+            )
             
-            if destinatarios:
+            if df is None:
+                st.info("A leitura dos certificados ainda está em andamento. Tente novamente em instantes.")
+            elif destinatarios:
                 st.session_state.mostrar_confirmacao_envio = True
                 st.session_state.destinatarios_pendentes = destinatarios
             else:
@@ -544,22 +454,24 @@ def pagina_configuracoes():
             
             if arquivo:
                 try:
-                    df_import = pd.read_csv(arquivo)
+                    # Prévia só do início do arquivo; a importação lê o arquivo inteiro em blocos
+                    df_import = pd.read_csv(arquivo, nrows=LINHAS_PREVIA_IMPORTACAO, dtype=str)
                     st.dataframe(df_import, hide_index=True)
+                    if len(df_import) == LINHAS_PREVIA_IMPORTACAO:
+                        st.caption(f"Exibindo as primeiras {LINHAS_PREVIA_IMPORTACAO} linhas.")
                     
                     if st.button("✅ Confirmar Importação", type="primary", width="stretch"):
-                        importados = 0
-                        for _, row in df_import.iterrows():
-                            if db.salvar_cliente(
-                                codigo=str(row.get('codigo', '')),
-                                razao_social=str(row.get('razao_social', '')),
-                                email=str(row.get('email', '')) if pd.notna(row.get('email')) else None,
-                                telefone=str(row.get('telefone', '')) if pd.notna(row.get('telefone')) else None,
-                                responsavel=str(row.get('responsavel', '')) if pd.notna(row.get('responsavel')) else None,
-                                observacoes=str(row.get('observacoes', '')) if pd.notna(row.get('observacoes')) else None
-                            ):
-                                importados += 1
-                        st.success(f"{importados} cadastros importados!")
+                        arquivo.seek(0)
+                        resultado = db.importar_clientes_csv(arquivo)
+                        st.success(f"{resultado['importados']} de {resultado['total']} cadastros importados!")
+                        if resultado["erros"]:
+                            st.warning(f"{len(resultado['erros'])} linha(s) com erro não foram importadas.")
+                            st.dataframe(
+                                pd.DataFrame(resultado["erros"]).rename(columns={
+                                    "linha": "Linha", "codigo": "Código", "mensagem": "Erro"
+                                }),
+                                hide_index=True
+                            )
                 except Exception as e:
                     st.error(f"Erro ao ler arquivo: {e}")
         
@@ -568,6 +480,83 @@ def pagina_configuracoes():
         st.code("codigo,razao_social,email,telefone,responsavel,observacoes")
     
     with tab4:
+        st.subheader("Leitura dos Certificados")
+        
+        st.markdown(
+            "A descriptografia dos arquivos .pfx é distribuída entre vários processos. "
+            "Use **0** para aproveitar todos os núcleos do servidor "
+            f"({os.cpu_count() or 1} disponíveis) ou **1** para ler um arquivo por vez."
+        )
+        
+        processos_leitura = st.number_input(
+            "Processos de leitura",
+            min_value=0,
+            max_value=64,
+            value=int(configs.get("processos_leitura", "0") or "0"),
+            step=1
+        )
+        
+        prazo_leitura = st.number_input(
+            "Prazo de leitura por arquivo (segundos)",
+            min_value=1,
+            max_value=600,
+            value=int(scanner.get_prazo_leitura(configs.get("prazo_leitura", ""))),
+            step=1,
+            help="Arquivos que não abrirem nesse prazo (ex.: ainda sendo baixados do "
+                 "Google Drive) ficam com status Timeout e são lidos de novo em segundo plano."
+        )
+        
+        # As senhas salvas não são exibidas (st.text_area não tem type="password"):
+        # o campo começa vazio e, se preenchido, substitui a lista salva
+        senhas_atuais = scanner.get_senhas_alternativas(configs.get("senhas_alternativas", ""))
+        senhas_alternativas = st.text_area(
+            "Senhas alternativas (uma por linha)",
+            value="",
+            placeholder=(
+                f"{len(senhas_atuais)} senha(s) salva(s). Deixe em branco para mantê-las."
+                if senhas_atuais else "Nenhuma senha salva"
+            ),
+            help="Tentadas uma única vez nos arquivos que não abrem com a senha do nome. "
+                 "A senha que funcionar fica lembrada para o arquivo. As senhas digitadas "
+                 "substituem as salvas, que não são exibidas."
+        )
+        apagar_senhas = st.checkbox(
+            "Apagar as senhas alternativas salvas",
+            value=False,
+            disabled=not senhas_atuais
+        )
+        
+        aquecimento_inicializacao = st.toggle(
+            "Ler a pasta ao iniciar o servidor",
+            value=configs.get("aquecimento_inicializacao", "true") == "true",
+            help="Com o servidor iniciado por `python servidor.py`, a pasta é lida assim que "
+                 "o processo sobe, antes do primeiro acesso."
+        )
+        if configs.get("aquecimento_em"):
+            st.caption(
+                f"Última leitura na inicialização: {configs.get('aquecimento_duracao', '?')} s "
+                f"(concluída em {datetime.fromisoformat(configs['aquecimento_em']).strftime('%d/%m/%Y %H:%M')})."
+            )
+        
+        if st.button("💾 Salvar Leitura", type="primary"):
+            if apagar_senhas:
+                novas_senhas = []
+            elif senhas_alternativas.strip():
+                novas_senhas = scanner.get_senhas_alternativas(db.encode_senha(senhas_alternativas))
+            else:
+                novas_senhas = senhas_atuais
+            db.salvar_configuracoes({
+                "processos_leitura": str(processos_leitura),
+                "prazo_leitura": str(prazo_leitura),
+                "senhas_alternativas": db.encode_senha("\n".join(novas_senhas)),
+                "aquecimento_inicializacao": "true" if aquecimento_inicializacao else "false"
+            })
+            if novas_senhas != senhas_atuais:
+                # Arquivos com erro de leitura serão tentados com as novas senhas
+                db.limpar_cache_erros()
+            st.success("Salvo!")
+    
+    with tab5:
         st.subheader("Sobre o Sistema")
         
         stats = db.get_estatisticas()
@@ -696,8 +685,16 @@ def modal_cadastro_cliente(codigo: str, razao_social: str):
 
 def renderizar_painel_acoes_pendentes(df: pd.DataFrame, clientes_db: dict):
     """Renderiza o painel de ações pendentes."""
-    vencidos = df[df['Status'] == 'Vencido']
-    atencao = df[df['Status'] == 'Atenção']
+    vencendo = pd.DataFrame(
+        db.get_certificados_vencendo(CAMINHO_CERTIFICADOS, 30),
+        columns=['codigo', 'cliente', 'vencimento', 'dias_para_vencer']
+    ).rename(columns={
+        'codigo': 'Código', 'cliente': 'Cliente',
+        'vencimento': 'Vencimento', 'dias_para_vencer': 'Dias para Vencer'
+    })
+    vencendo['Vencimento'] = vencendo['Vencimento'].map(lambda d: d.strftime('%d/%m/%Y'))
+    vencidos = vencendo[vencendo['Dias para Vencer'] < 0]
+    atencao = vencendo[vencendo['Dias para Vencer'] >= 0]
     sem_email = df[df['Email'] == "—"]
     
     # Só mostra se houver ações pendentes
@@ -762,7 +759,7 @@ def renderizar_painel_acoes_pendentes(df: pd.DataFrame, clientes_db: dict):
     st.markdown("---")
 
 
-def pagina_dashboard():
+def pagina_dashboard(df: Optional[pd.DataFrame]):
     """Renderiza a página principal do dashboard."""
     # Header
     st.markdown(render_header(
@@ -779,27 +776,53 @@ def pagina_dashboard():
     
     # Verifica caminho
     if not os.path.exists(CAMINHO_CERTIFICADOS):
-        st.error(f"O caminho especificado não existe: `{CAMINHO_CERTIFICADOS}`")
-        return
+        if df is None:
+            st.error(f"O caminho especificado não existe: `{CAMINHO_CERTIFICADOS}`")
+            return
+        st.warning(
+            f"A pasta `{CAMINHO_CERTIFICADOS}` não está acessível no momento. "
+            "Exibindo a última leitura salva; a pasta será lida quando voltar a ficar disponível."
+        )
     
-    # Processa certificados (com progresso na primeira vez)
-    if "df_certificados" not in st.session_state:
-        df = processar_certificados_com_progresso(CAMINHO_CERTIFICADOS)
-        st.session_state.df_certificados = df
+    # Varredura em segundo plano (primeira leitura ou "Atualizar Dados")
+    servico = get_servico_varredura()
+    if servico.em_andamento(CAMINHO_CERTIFICADOS):
+        acompanhar_varredura(CAMINHO_CERTIFICADOS)
     else:
-        df = processar_certificados(CAMINHO_CERTIFICADOS)
+        fila = db.get_progresso_fila(CAMINHO_CERTIFICADOS)
+        if fila["restantes"] and not fila["parada"]:
+            acompanhar_fila(CAMINHO_CERTIFICADOS)
+    
+    if df is None:
+        falha = servico.falha(CAMINHO_CERTIFICADOS)
+        if falha is not None:
+            st.error(f"Erro ao ler a pasta de certificados: {falha.erro}")
+        return
     
     if df.empty:
         st.warning("Nenhum arquivo .pfx encontrado na pasta especificada.")
         return
     
+    ultima = servico.ultima(CAMINHO_CERTIFICADOS)
+    if ultima is not None and ultima.do_snapshot:
+        st.caption(
+            f"🕒 Exibindo a última leitura salva ({formatar_idade(ultima.concluida_em)}). "
+            "Os dados serão atualizados quando a leitura da pasta terminar."
+        )
+    
+    if ultima is not None and ultima.timeouts:
+        st.info(
+            f"⏱️ {ultima.timeouts} arquivo(s) não responderam a tempo na pasta de certificados. "
+            "Uma nova leitura será feita automaticamente em segundo plano."
+        )
+    
     # Executa notificações automáticas na inicialização
     if "notificacoes_enviadas" not in st.session_state:
         configs = db.get_todas_configuracoes()
-        if configs.get("notificacao_automatica") == "true":
+        if configs.get("notificacao_automatica") == "true" and ultima is not None:
             dias_limite = int(configs.get("dias_notificacao", "30"))
             resultado = email_svc.processar_notificacoes_automaticas(
-                df.to_dict('records'),
+                ultima.registros,
                 dias_limite=dias_limite
             )
             st.session_state.notificacoes_enviadas = True
@@ -807,18 +830,21 @@ def pagina_dashboard():
             if resultado["enviados_sucesso"] > 0:
                 st.toast(f"📧 {resultado['enviados_sucesso']} notificação(ões) enviada(s)!")
     
-    # Adiciona coluna de email cadastrado
+    # Adiciona coluna de email cadastrado (sem alterar o resultado compartilhado)
     clientes_db = {c["codigo"]: c for c in db.get_todos_clientes()}
-    df["Email"] = df["Código"].apply(
+    df = df.assign(Email=df["Código"].apply(
         lambda x: "✓" if x in clientes_db and clientes_db[x].get("email") else "—"
-    )
+    ))
     
-    # Métricas
+    # Métricas: as contagens por vencimento vêm do índice da tabela certificados,
+    # que mantém o último vencimento lido dos arquivos que deram timeout agora
     total = len(df)
-    vencidos = len(df[df['Status'] == 'Vencido'])
-    atencao = len(df[df['Status'] == 'Atenção'])
-    validos = len(df[df['Status'] == 'Válido'])
+    contagem = db.get_contagem_status_certificados(CAMINHO_CERTIFICADOS)
+    vencidos = contagem['Vencido']
+    atencao = contagem['Atenção']
+    validos = contagem['Válido']
     erros = len(df[df['Status'].str.contains('Erro', na=False)])
+    mantidos = vencidos + atencao + validos - int(df['Status'].isin(scanner.STATUS[:3]).sum())
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -833,6 +859,13 @@ def pagina_dashboard():
     with col5:
         st.markdown(render_metric_card(erros, "Erros", "erro"), unsafe_allow_html=True)
     
+    if mantidos > 0:
+        st.caption(
+            f"Vencidos, Atenção e Válidos incluem {mantidos} arquivo(s) que não responderam "
+            "nesta leitura, pelo último vencimento lido; na tabela eles aparecem como "
+            f"{scanner.STATUS_TIMEOUT}."
+        )
+    
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Painel de Ações Pendentes
@@ -843,6 +876,25 @@ def pagina_dashboard():
         fig = criar_grafico_vencimentos(df)
         st.plotly_chart(fig, width="stretch")
     
+    # Relatório de arquivos duplicados (mesmo conteúdo com nomes diferentes)
+    duplicados = db.get_arquivos_duplicados(CAMINHO_CERTIFICADOS)
+    if duplicados:
+        copias = sum(len(grupo["arquivos"]) - 1 for grupo in duplicados)
+        with st.expander(f"📑 Arquivos Duplicados ({copias} cópia(s))", expanded=False):
+            st.caption(
+                "Arquivos .pfx com conteúdo idêntico. Cada conteúdo é lido uma única vez; "
+                "uma cópia cuja senha no nome não abre o arquivo aparece com erro na leitura."
+            )
+            st.dataframe(
+                pd.DataFrame([
+                    {"Grupo": i, "Arquivo": arquivo, "Leitura": status}
+                    for i, grupo in enumerate(duplicados, start=1)
+                    for arquivo, status in zip(grupo["arquivos"], grupo["status"])
+                ]),
+                hide_index=True,
+                width="stretch"
+            )
+    
     # Filtros e Busca
     st.markdown("### 📋 Certificados")
     
@@ -858,7 +910,7 @@ def pagina_dashboard():
     with col2:
         filtro_status = st.selectbox(
             "Filtrar por Status",
-            ["Todos", "Vencido", "Atenção", "Válido", "Erro"],
+            ["Todos", "Vencido", "Atenção", "Válido", "Erro", scanner.STATUS_TIMEOUT],
             label_visibility="collapsed"
         )
     
@@ -970,21 +1022,20 @@ def main():
     if "cliente_selecionado" not in st.session_state:
         st.session_state.cliente_selecionado = None
     
-    # Calcula métricas para sidebar (apenas se estiver no dashboard)
+    # Varredura única da execução: compartilhada por sidebar, dashboard e configurações
+    df = carregar_certificados(CAMINHO_CERTIFICADOS)
+    
+    # Calcula métricas para sidebar
     vencidos = 0
     atencao = 0
     sem_email = 0
     
-    if os.path.exists(CAMINHO_CERTIFICADOS):
-        df_sidebar = processar_certificados(CAMINHO_CERTIFICADOS)
-        if not df_sidebar.empty:
-            clientes_db = {c["codigo"]: c for c in db.get_todos_clientes()}
-            df_sidebar["Email"] = df_sidebar["Código"].apply(
-                lambda x: "✓" if x in clientes_db and clientes_db[x].get("email") else "—"
-            )
-            vencidos = len(df_sidebar[df_sidebar['Status'] == 'Vencido'])
-            atencao = len(df_sidebar[df_sidebar['Status'] == 'Atenção'])
-            sem_email = len(df_sidebar[df_sidebar['Email'] == "—"])
+    if df is not None and not df.empty:
+        codigos_com_email = {c["codigo"] for c in db.get_todos_clientes() if c.get("email")}
+        contagem = db.get_contagem_status_certificados(CAMINHO_CERTIFICADOS)
+        vencidos = contagem['Vencido']
+        atencao = contagem['Atenção']
+        sem_email = int((~df['Código'].isin(codigos_com_email)).sum())
     
     # Sidebar
     with st.sidebar:
@@ -1013,9 +1064,8 @@ def main():
         st.markdown("---")
         
         if st.button("🔄 Atualizar Dados", width="stretch"):
-            st.cache_data.clear()
-            if "df_certificados" in st.session_state:
-                del st.session_state.df_certificados
+            # Nova varredura em segundo plano; o resultado atual segue visível até ela terminar
+            get_servico_varredura().iniciar(CAMINHO_CERTIFICADOS)
             st.session_state.notificacoes_enviadas = False
             st.rerun()
         
@@ -1032,7 +1082,9 @@ def main():
         if sem_email > 0:
             badges_html += render_badge(f"{sem_email} Sem Email", "muted")
         
-        if badges_html:
+        if df is None:
+            st.markdown("⏳ Lendo certificados...")
+        elif badges_html:
             st.markdown(badges_html, unsafe_allow_html=True)
         else:
             st.markdown("✅ Nenhum alerta")
@@ -1058,11 +1110,11 @@ def main():
     
     # Renderiza página atual
     if st.session_state.pagina == "config":
-        pagina_configuracoes()
+        pagina_configuracoes(df)
     elif st.session_state.pagina == "manual":
         pagina_manual()
     else:
-        pagina_dashboard()
+        pagina_dashboard(df)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+"""
+Benchmark do acesso ao banco em uma execução do dashboard.
+Repete as consultas de uma execução da página (configurações, clientes,
+estatísticas, contagens e listas de certificados, fila e duplicados) com
+uma conexão nova por função, como antes (sqlite3.connect em uma cópia do
+banco em modo journal DELETE, já que o modo WAL fica gravado no arquivo), e
+com a conexão reaproveitada por thread em modo WAL (database.get_connection).
+
+Uso:
+    python benchmarks/bench_banco.py [quantidade de certificados]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+REPETICOES = 50
+PASTA = "/certificados"
+CAMINHO_AVULSA = None
+
+
+def copiar_sem_wal(destino: str):
+    """Copia o banco populado para `destino`, em modo journal DELETE."""
+    origem = sqlite3.connect(db.DB_PATH)
+    copia = sqlite3.connect(destino)
+    origem.backup(copia)
+    modo = copia.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+    copia.close()
+    origem.close()
+    assert modo == "delete", modo
+
+
+def conexao_avulsa() -> sqlite3.Connection:
+    """Conexão anterior ao reaproveitamento: uma nova por chamada."""
+    conn = sqlite3.connect(CAMINHO_AVULSA, timeout=db.TIMEOUT_CONEXAO)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def popular(quantidade: int):
+    """Cria clientes, certificados e notificações de exemplo."""
+    agora = datetime.now(timezone.utc)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT OR REPLACE INTO clientes (codigo, razao_social, email) VALUES (?, ?, ?)",
+        [(f"{i:05d}", f"EMPRESA {i} LTDA", f"contato{i}@exemplo.com" if i % 3 else "")
+         for i in range(quantidade // 10)]
+    )
+    conn.commit()
+    conn.close()
+    
+    db.salvar_certificados(PASTA, [
+        type("Certificado", (), {
+            "arquivo": f"{i:05d}.pfx", "codigo": f"{i:05d}", "cliente": f"EMPRESA {i} LTDA",
+            "vencimento": agora + timedelta(days=i % 900 - 300), "thumbprint": None
+        })
+        for i in range(quantidade)
+    ], [])
+    for i in range(200):
+        db.registrar_notificacao(f"{i:05d}", "vencimento", i % 5 != 0)
+
+
+# Consultas de uma execução da página principal (na ordem em que são feitas)
+EXECUCAO_DASHBOARD = [
+    ("get_todas_configuracoes", lambda: db.get_todas_configuracoes()),
+    ("get_estatisticas", lambda: db.get_estatisticas()),
+    ("get_contagem_status_certificados", lambda: db.get_contagem_status_certificados(PASTA)),
+    ("get_progresso_fila", lambda: db.get_progresso_fila(PASTA)),
+    ("get_progresso_fila", lambda: db.get_progresso_fila(PASTA)),
+    ("get_todos_clientes", lambda: db.get_todos_clientes()),
+    ("get_certificados_vencendo", lambda: db.get_certificados_vencendo(PASTA, 30)),
+    ("get_todos_clientes", lambda: db.get_todos_clientes()),
+    ("get_contagem_status_certificados", lambda: db.get_contagem_status_certificados(PASTA)),
+    ("get_arquivos_duplicados", lambda: db.get_arquivos_duplicados(PASTA)),
+    ("get_configuracao", lambda: db.get_configuracao("tema")),
+    ("get_configuracao", lambda: db.get_configuracao("dias_notificacao")),
+    ("get_historico_notificacoes", lambda: db.get_historico_notificacoes(50)),
+]
+
+
+def medir() -> dict:
+    """Melhor tempo de cada consulta da execução (somado por nome)."""
+    tempos = {}
+    for nome, consulta in EXECUCAO_DASHBOARD:
+        melhor = float("inf")
+        for _ in range(REPETICOES):
+            inicio = time.perf_counter()
+            consulta()
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = tempos.get(nome, 0.0) + melhor
+    return tempos
+
+
+def main():
+    global CAMINHO_AVULSA
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        db.DATA_DIR = pasta_temporaria
+        db.DB_PATH = os.path.join(pasta_temporaria, "certificados.db")
+        db.init_database()
+        popular(quantidade)
+        CAMINHO_AVULSA = os.path.join(pasta_temporaria, "certificados_avulsa.db")
+        copiar_sem_wal(CAMINHO_AVULSA)
+        
+        conexao_compartilhada = db.get_connection
+        db.get_connection = conexao_avulsa
+        tempo_avulsa = medir()
+        
+        db.get_connection = conexao_compartilhada
+        tempo_compartilhada = medir()
+    
+    print(f"{quantidade} certificados, {len(EXECUCAO_DASHBOARD)} consultas por execução")
+    print(f"{'Consulta':<34} {'Avulsa':>11} {'Compartilhada':>14}")
+    for nome in tempo_avulsa:
+        print(f"{nome:<34} {tempo_avulsa[nome] * 1000:>8.3f} ms {tempo_compartilhada[nome] * 1000:>11.3f} ms")
+    total_avulsa = sum(tempo_avulsa.values())
+    total_compartilhada = sum(tempo_compartilhada.values())
+    print(f"{'Total da execução':<34} {total_avulsa * 1000:>8.3f} ms {total_compartilhada * 1000:>11.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark da montagem do DataFrame de certificados.
+Compara a montagem antiga (lista de dicionários, calcular_status por linha e
+ordenação com coluna auxiliar) com o construtor colunar do scanner
+(montar_base + calcular_situacao) e com o recálculo por execução da página
+(só calcular_situacao).
+
+Uso:
+    python benchmarks/bench_dataframe.py [quantidade de registros ...]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import scanner
+
+REPETICOES = 5
+
+
+def gerar_registros(quantidade: int) -> list:
+    """Gera registros de varredura com vencimentos variados e ~2% de erros."""
+    aleatorio = random.Random(42)
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    registros = []
+
+    for i in range(quantidade):
+        sorteio = aleatorio.random()
+        if sorteio < 0.01:
+            status, vencimento = scanner.StatusLeitura.ERRO_LEITURA, None
+        elif sorteio < 0.02:
+            status, vencimento = scanner.StatusLeitura.NOME_INVALIDO, None
+        else:
+            status = scanner.StatusLeitura.OK
+            # Meio-dia de distância das viradas de dia: o resultado não depende do instante da medição
+            vencimento = agora + timedelta(days=aleatorio.randint(-400, 800), hours=12, seconds=i % 3600)
+        registros.append(scanner.CertificadoRecord(
+            f"{i:05d}.pfx", f"{i:05d}", f"EMPRESA {i} LTDA", vencimento, status, None, None
+        ))
+
+    return registros
+
+
+def montagem_antiga(registros: list) -> pd.DataFrame:
+    """Montagem anterior ao construtor colunar (linha a linha, registros em dicionários)."""
+    hoje = datetime.now(timezone.utc)
+    dados = []
+
+    for registro in registros:
+        data_vencimento = registro['vencimento']
+
+        if data_vencimento is None:
+            dados.append({
+                'Código': registro['codigo'],
+                'Cliente': registro['cliente'],
+                'Vencimento': None,
+                'Dias para Vencer': None,
+                'Status': registro['status'].value
+            })
+            continue
+
+        dias_para_vencer = (data_vencimento - hoje).days
+
+        dados.append({
+            'Código': registro['codigo'],
+            'Cliente': registro['cliente'],
+            'Vencimento': data_vencimento.strftime('%d/%m/%Y'),
+            'Dias para Vencer': dias_para_vencer,
+            'Status': scanner.calcular_status(dias_para_vencer)
+        })
+
+    df = pd.DataFrame(dados, columns=scanner.COLUNAS)
+    df['_ordem'] = df['Dias para Vencer'].apply(
+        lambda x: x if x is not None else float('inf')
+    )
+    df = df.sort_values(['_ordem', 'Código'], kind='stable').drop('_ordem', axis=1)
+    return df.reset_index(drop=True)
+
+
+def medir(funcao, *args) -> tuple:
+    melhor = float('inf')
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [5000, 50000]
+
+    print(f"{'Registros':>10} {'Antiga':>12} {'Colunar':>12} {'Ganho':>8} {'Recálculo':>12}")
+    for quantidade in quantidades:
+        registros = gerar_registros(quantidade)
+
+        dicionarios = [registro._asdict() for registro in registros]
+        tempo_antigo, esperado = medir(montagem_antiga, dicionarios)
+        tempo_colunar, obtido = medir(scanner.montar_dataframe, registros)
+        base = scanner.montar_base(registros)
+        tempo_recalculo, _ = medir(scanner.calcular_situacao, base)
+
+        if (esperado['Status'].tolist() != obtido['Status'].astype(str).tolist()
+                or esperado['Código'].tolist() != obtido['Código'].tolist()):
+            raise SystemExit(f"Resultados divergentes para {quantidade} registros")
+
+        print(
+            f"{quantidade:>10} "
+            f"{tempo_antigo * 1000:>9.1f} ms "
+            f"{tempo_colunar * 1000:>9.1f} ms "
+            f"{tempo_antigo / tempo_colunar:>7.2f}x "
+            f"{tempo_recalculo * 1000:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark da leitura de certificados .pfx.
+Compara o leitor completo (pkcs12.load_key_and_certificates) com o leitor
+rápido do pfx_reader, que decifra apenas o SafeBag do certificado.
+
+Os bundles em RC2-40 (padrão do Windows e das exportações antigas do OpenSSL,
+o caso comum dos A1) são gerados com o comando openssl (pkcs12 -export
+-legacy), pois a biblioteca cryptography não gera RC2; sem o openssl no
+PATH, esses algoritmos são ignorados.
+
+Uso:
+    python benchmarks/bench_leitura_pfx.py [quantidade_por_algoritmo]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import (
+    pkcs12, Encoding, NoEncryption, PrivateFormat
+)
+
+import pfx_reader
+
+SENHA = "1234"
+
+# Algoritmos equivalentes aos usados pelo Windows e pelo OpenSSL 3
+ALGORITMOS = {
+    "3DES / SHA1 (2048 it.)": (pkcs12.PBES.PBESv1SHA1And3KeyTripleDESCBC, hashes.SHA1(), 2048),
+    "AES-256 / SHA256 (2048 it.)": (pkcs12.PBES.PBESv2SHA256AndAES256CBC, hashes.SHA256(), 2048),
+    "AES-256 / SHA256 (10000 it.)": (pkcs12.PBES.PBESv2SHA256AndAES256CBC, hashes.SHA256(), 10000),
+}
+
+# Algoritmos gerados pelo comando openssl: opções do "openssl pkcs12 -export"
+ALGORITMOS_OPENSSL = {
+    "RC2-40 / SHA1 (2048 it.)": ["-legacy", "-certpbe", "PBE-SHA1-RC2-40", "-keypbe", "PBE-SHA1-3DES"],
+}
+
+
+def gerar_certificado(chave) -> x509.Certificate:
+    """Gera um certificado autoassinado, no formato de um A1."""
+    agora = datetime.now(timezone.utc)
+    nome = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "EMPRESA EXEMPLO LTDA")])
+    return (
+        x509.CertificateBuilder()
+        .subject_name(nome)
+        .issuer_name(nome)
+        .public_key(chave.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(agora)
+        .not_valid_after(agora + timedelta(days=365))
+        .sign(chave, hashes.SHA256())
+    )
+
+
+def gerar_bundle(chave, algoritmo, hash_mac, iteracoes: int) -> bytes:
+    """Gera um PKCS#12 com certificado autoassinado, no formato de um A1."""
+    cifragem = (
+        PrivateFormat.PKCS12.encryption_builder()
+        .kdf_rounds(iteracoes)
+        .key_cert_algorithm(algoritmo)
+        .hmac_hash(hash_mac)
+        .build(SENHA.encode())
+    )
+    return pkcs12.serialize_key_and_certificates(b"a1", chave, gerar_certificado(chave), None, cifragem)
+
+
+def gerar_bundle_openssl(chave, opcoes: list) -> bytes:
+    """Gera um PKCS#12 com o comando openssl (algoritmos que a cryptography não gera)."""
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo_chave = os.path.join(pasta, "chave.pem")
+        arquivo_certificado = os.path.join(pasta, "certificado.pem")
+        with open(arquivo_chave, "wb") as f:
+            f.write(chave.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()))
+        with open(arquivo_certificado, "wb") as f:
+            f.write(gerar_certificado(chave).public_bytes(Encoding.PEM))
+        
+        return subprocess.run(
+            ["openssl", "pkcs12", "-export", *opcoes, "-name", "a1",
+             "-inkey", arquivo_chave, "-in", arquivo_certificado, "-passout", f"pass:{SENHA}"],
+            check=True, capture_output=True
+        ).stdout
+
+
+def leitor_completo(pfx_data: bytes) -> datetime:
+    _, certificado, _ = pkcs12.load_key_and_certificates(pfx_data, SENHA.encode())
+    return certificado.not_valid_after_utc
+
+
+def medir(funcao, bundles) -> tuple:
+    inicio = time.perf_counter()
+    resultados = [funcao(bundle) for bundle in bundles]
+    return time.perf_counter() - inicio, resultados
+
+
+def comparar(nome: str, bundles: list):
+    """Mede os dois leitores nos bundles e confere se retornam o mesmo vencimento."""
+    tempo_completo, esperado = medir(leitor_completo, bundles)
+    tempo_rapido, obtido = medir(lambda b: pfx_reader.ler_vencimento_pfx(b, SENHA), bundles)
+    
+    if esperado != obtido:
+        raise SystemExit(f"Resultados divergentes para {nome}")
+    
+    quantidade = len(bundles)
+    print(
+        f"{nome:<30} "
+        f"{tempo_completo / quantidade * 1000:>9.2f} ms "
+        f"{tempo_rapido / quantidade * 1000:>9.2f} ms "
+        f"{tempo_completo / tempo_rapido:>7.2f}x"
+    )
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    
+    print(f"{'Algoritmo':<30} {'Completo':>12} {'Rápido':>12} {'Ganho':>8}")
+    for nome, (algoritmo, hash_mac, iteracoes) in ALGORITMOS.items():
+        comparar(nome, [gerar_bundle(chave, algoritmo, hash_mac, iteracoes) for _ in range(quantidade)])
+    
+    if shutil.which("openssl") is None:
+        print("openssl não encontrado no PATH: algoritmos RC2 ignorados")
+        return
+    for nome, opcoes in ALGORITMOS_OPENSSL.items():
+        comparar(nome, [gerar_bundle_openssl(chave, opcoes) for _ in range(quantidade)])
+
+
+if __name__ == "__main__":
+    main()
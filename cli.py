@@ -0,0 +1,165 @@
+"""
+Linha de comando do Gerenciador de Certificados: varre a pasta de
+certificados e, opcionalmente, envia as notificações automáticas, sem
+interface (ex.: agendado no cron ou no Agendador de Tarefas). Não importa
+streamlit nem plotly.
+
+Uso:
+    python cli.py [--pasta PASTA] [--processos N] [--saida ARQUIVO.json|.csv|.parquet]
+                  [--formato json|csv|parquet] [--notificar] [--tempos]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+
+import pandas as pd
+
+import database as db
+import email_service as email_svc
+import scanner
+
+FORMATOS = ("json", "csv", "parquet")
+
+# Colunas da saída (uma linha por arquivo .pfx)
+COLUNAS_SAIDA = [
+    "arquivo", "codigo", "cliente", "vencimento", "dias_para_vencer",
+    "status", "leitura", "erro", "thumbprint"
+]
+
+
+def montar_saida(registros: List[scanner.CertificadoRecord]) -> List[Dict[str, Any]]:
+    """
+    Converte os registros da varredura nas linhas da saída, com dias para
+    vencer e status (como no dashboard) calculados para o instante atual.
+    """
+    agora = datetime.now(timezone.utc)
+    linhas = []
+    
+    for registro in registros:
+        if registro.vencimento is None:
+            dias_para_vencer = None
+            status = registro.status.value
+        else:
+            dias_para_vencer = (registro.vencimento - agora).days
+            status = scanner.calcular_status(dias_para_vencer)
+        
+        linhas.append({
+            "arquivo": registro.arquivo,
+            "codigo": registro.codigo,
+            "cliente": registro.cliente,
+            "vencimento": registro.vencimento.isoformat() if registro.vencimento else None,
+            "dias_para_vencer": dias_para_vencer,
+            "status": status,
+            "leitura": registro.status.value,
+            "erro": registro.erro,
+            "thumbprint": registro.thumbprint,
+        })
+    
+    linhas.sort(key=lambda linha: (
+        linha["dias_para_vencer"] is None, linha["dias_para_vencer"] or 0, linha["codigo"]
+    ))
+    return linhas
+
+
+def gravar_saida(linhas: List[Dict[str, Any]], caminho: str, formato: str):
+    """Grava as linhas em JSON, CSV (UTF-8 com BOM, para o Excel) ou Parquet (requer pyarrow)."""
+    if formato == "json":
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+        return
+    
+    df = pd.DataFrame(linhas, columns=COLUNAS_SAIDA)
+    df["dias_para_vencer"] = df["dias_para_vencer"].astype("Int32")
+    
+    if formato == "csv":
+        df.to_csv(caminho, index=False, encoding="utf-8-sig")
+    else:
+        try:
+            df.to_parquet(caminho, index=False)
+        except ImportError as e:
+            raise SystemExit(f"A saída em Parquet requer o pacote pyarrow (pip install pyarrow): {e}")
+
+
+def get_formato(args) -> str:
+    """Formato informado ou deduzido da extensão do arquivo de saída (padrão: json)."""
+    if args.formato:
+        return args.formato
+    extensao = os.path.splitext(args.saida)[1].lower().lstrip(".")
+    return extensao if extensao in FORMATOS else "json"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Varredura dos certificados digitais sem interface")
+    parser.add_argument("--pasta", default=scanner.CAMINHO_CERTIFICADOS,
+                        help="Pasta dos certificados (padrão: scanner.CAMINHO_CERTIFICADOS)")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Processos de descriptografia (padrão: o das Configurações; 0 = todos os núcleos)")
+    parser.add_argument("--prazo", type=float, default=None,
+                        help="Prazo de leitura por arquivo, em segundos (padrão: o das Configurações)")
+    parser.add_argument("--saida", help="Arquivo de saída com um registro por certificado")
+    parser.add_argument("--formato", choices=FORMATOS, help="Formato da saída (padrão: pela extensão)")
+    parser.add_argument("--notificar", action="store_true",
+                        help="Envia as notificações automáticas (se ativadas nas Configurações)")
+    parser.add_argument("--tempos", action="store_true", help="Exibe os tempos de cada etapa")
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.pasta):
+        print(f"Pasta não encontrada: {args.pasta}", file=sys.stderr)
+        return 1
+    
+    processos = args.processos
+    if processos is not None:
+        processos = scanner.get_numero_processos(str(processos))
+    
+    tempos = {}
+    inicio = time.perf_counter()
+    registros = list(scanner.varrer_certificados(args.pasta, processos=processos, prazo=args.prazo))
+    scanner.salvar_snapshot(args.pasta, registros)
+    tempos["varredura"] = time.perf_counter() - inicio
+    
+    linhas = montar_saida(registros)
+    contagem: Dict[str, int] = {}
+    for linha in linhas:
+        contagem[linha["status"]] = contagem.get(linha["status"], 0) + 1
+    print(f"{len(linhas)} arquivo(s) em {args.pasta}: " + ", ".join(
+        f"{status}: {quantidade}" for status, quantidade in sorted(contagem.items())
+    ))
+    
+    if args.saida:
+        inicio = time.perf_counter()
+        formato = get_formato(args)
+        gravar_saida(linhas, args.saida, formato)
+        tempos["saida"] = time.perf_counter() - inicio
+        print(f"Saída gravada em {args.saida} ({formato})")
+    
+    if args.notificar:
+        inicio = time.perf_counter()
+        if db.get_configuracao("notificacao_automatica") != "true":
+            print("Notificações automáticas desativadas nas Configurações; nada enviado")
+        else:
+            dias_limite = int(db.get_configuracao("dias_notificacao") or "30")
+            resultado = email_svc.processar_notificacoes_automaticas(registros, dias_limite=dias_limite)
+            print(
+                f"Notificações: {resultado['enviados_sucesso']} enviada(s), "
+                f"{resultado['enviados_erro']} com erro, "
+                f"{resultado['ignorados_sem_email']} sem email, "
+                f"{resultado['ignorados_ja_enviado']} já notificado(s)"
+            )
+        tempos["notificacoes"] = time.perf_counter() - inicio
+    
+    if args.tempos:
+        for etapa, segundos in tempos.items():
+            print(f"Tempo de {etapa}: {segundos:.2f} s")
+        if tempos["varredura"] > 0:
+            print(f"Taxa: {len(registros) / tempos['varredura']:.0f} arquivo(s)/s")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
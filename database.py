@@ -3,32 +3,99 @@ Módulo de banco de dados SQLite para o Gerenciador de Certificados.
 Gerencia clientes, configurações e histórico de notificações.
 """
 
+import csv
+import io
+import json
 import os
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Set, IO
 import base64
 
 # Caminho do banco de dados
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 DB_PATH = os.path.join(DATA_DIR, "certificados.db")
 
+# Espera, em segundos, por um banco bloqueado por outro processo
+TIMEOUT_CONEXAO = 30.0
 
-def get_connection() -> sqlite3.Connection:
-    """Retorna uma conexão com o banco de dados."""
+
+# Páginas (KiB, valor negativo) do cache de cada conexão e consultas preparadas guardadas
+TAMANHO_CACHE_KIB = 8192
+CONSULTAS_PREPARADAS = 256
+
+_conexoes = threading.local()
+
+
+class ConexaoCompartilhada:
+    """
+    Conexão da thread atual, reaproveitada por todas as funções do módulo.
+    `close()` não fecha a conexão: só desfaz uma transação deixada aberta (ex.:
+    após um erro), para que o próximo uso comece limpo. As demais operações
+    são as da sqlite3.Connection.
+    """
+    
+    def __init__(self, conexao: sqlite3.Connection):
+        self._conexao = conexao
+    
+    def __getattr__(self, nome: str):
+        return getattr(self._conexao, nome)
+    
+    def close(self):
+        if self._conexao.in_transaction:
+            self._conexao.rollback()
+
+
+def _abrir_conexao() -> sqlite3.Connection:
+    """Abre uma conexão nova, em modo WAL, com o cache e as consultas preparadas ajustados."""
     # Cria o diretório data se não existir
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    conn = sqlite3.connect(DB_PATH)
+    # Vários processos (workers da fila de varredura) podem gravar ao mesmo tempo
+    conn = sqlite3.connect(DB_PATH, timeout=TIMEOUT_CONEXAO, cached_statements=CONSULTAS_PREPARADAS)
     conn.row_factory = sqlite3.Row
+    
+    # WAL: leitores não bloqueiam o gravador (dashboard, varredura e workers ao mesmo tempo);
+    # com WAL, synchronous=NORMAL só sincroniza o disco nos checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{TAMANHO_CACHE_KIB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
     return conn
 
 
-def init_database():
-    """Inicializa o banco de dados criando as tabelas necessárias."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_connection() -> ConexaoCompartilhada:
+    """
+    Retorna a conexão com o banco de dados da thread atual, aberta no primeiro
+    uso. Um processo filho (fork) ou uma troca de DB_PATH abre uma conexão nova.
+    A primeira conexão do processo cria o banco ou aplica as migrações pendentes.
+    """
+    chave = (os.getpid(), DB_PATH)
+    conexao = getattr(_conexoes, "conexao", None)
     
+    if conexao is None or _conexoes.chave != chave:
+        nova = _abrir_conexao()
+        _preparar_banco(nova)
+        conexao = ConexaoCompartilhada(nova)
+        _conexoes.conexao = conexao
+        _conexoes.chave = chave
+    return conexao
+
+
+def _garantir_colunas(cursor: sqlite3.Cursor, tabela: str, colunas: Dict[str, str]):
+    """Adiciona à tabela as colunas que ainda não existem."""
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    existentes = {row["name"] for row in cursor.fetchall()}
+    
+    for coluna, tipo in colunas.items():
+        if coluna not in existentes:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+
+def _migracao_esquema_inicial(cursor: sqlite3.Cursor):
+    """Versão 1: clientes, configurações, notificações, cache de leituras e checkpoints."""
     # Tabela de clientes
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS clientes (
@@ -64,22 +131,204 @@ def init_database():
         )
     """)
     
-    # Insere configurações padrão se não existirem
-    configuracoes_padrao = [
-        ("smtp_email", ""),
-        ("smtp_senha", ""),
-        ("dias_notificacao", "30"),
-        ("notificacao_automatica", "false"),
-        ("nome_escritorio", "Escritório de Contabilidade"),
-    ]
+    # Tabela de cache das leituras dos arquivos .pfx
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_leituras (
+            pasta TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            vencimento TEXT,
+            status TEXT NOT NULL,
+            erro TEXT,
+            data_leitura DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (pasta, arquivo)
+        )
+    """)
     
-    for chave, valor in configuracoes_padrao:
-        cursor.execute("""
-            INSERT OR IGNORE INTO configuracoes (chave, valor) VALUES (?, ?)
-        """, (chave, valor))
+    # Tabela de checkpoints das varreduras (uma linha por pasta)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS varreduras (
+            pasta TEXT PRIMARY KEY,
+            total INTEGER,
+            processados INTEGER DEFAULT 0,
+            iniciada_em DATETIME,
+            atualizada_em DATETIME,
+            concluida_em DATETIME
+        )
+    """)
+
+
+def _migracao_identidade_arquivos(cursor: sqlite3.Cursor):
+    """Versão 2: inode, hash, thumbprint e senha lembrada no cache de leituras."""
+    _garantir_colunas(cursor, "cache_leituras", {
+        "inode": "INTEGER",
+        "hash_conteudo": "TEXT",
+        "thumbprint": "TEXT",
+        "senha_alternativa": "TEXT",
+    })
+
+
+def _migracao_certificados(cursor: sqlite3.Cursor):
+    """Versão 3: certificados lidos, indexados por vencimento."""
+    # Vencimento absoluto em UTC, "AAAA-MM-DD HH:MM:SS"
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS certificados (
+            pasta TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            codigo TEXT NOT NULL,
+            cliente TEXT NOT NULL,
+            vencimento TEXT NOT NULL,
+            thumbprint TEXT,
+            PRIMARY KEY (pasta, arquivo)
+        )
+    """)
     
-    conn.commit()
-    conn.close()
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_certificados_vencimento
+        ON certificados (pasta, vencimento)
+    """)
+
+
+def _migracao_snapshots(cursor: sqlite3.Cursor):
+    """Versão 4: snapshot da última varredura completa."""
+    # Uma linha por pasta; colunas dos registros serializadas em um único BLOB compactado
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots_varredura (
+            pasta TEXT PRIMARY KEY,
+            total INTEGER NOT NULL,
+            dados BLOB NOT NULL,
+            salvo_em DATETIME NOT NULL
+        )
+    """)
+
+
+def _migracao_fila_varredura(cursor: sqlite3.Cursor):
+    """Versão 5: fila de varredura (lotes de arquivos lidos por workers)."""
+    # Status 'pendente', 'em_execucao', 'concluido' ou 'falhou'; instantes em
+    # segundos desde a época, comparáveis entre processos e máquinas
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scan_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pasta TEXT NOT NULL,
+            arquivos TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            worker TEXT,
+            lease_ate REAL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            criado_em REAL NOT NULL,
+            concluido_em REAL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_scan_jobs_status
+        ON scan_jobs (status, pasta)
+    """)
+
+
+def _migracao_indice_notificacoes(cursor: sqlite3.Cursor):
+    """Versão 6: último envio com sucesso por cliente direto do índice."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notificacoes_cliente_envio
+        ON notificacoes (codigo_cliente, sucesso, data_envio)
+    """)
+
+
+def _migracao_versao_configuracoes(cursor: sqlite3.Cursor):
+    """
+    Versão 7: contador incrementado por gatilhos a cada gravação nas
+    configurações (de qualquer processo ou ferramenta), usado para validar o
+    cache de configurações em memória.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versao_configuracoes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO versao_configuracoes (id, versao) VALUES (1, 0)")
+    
+    for evento in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_configuracoes_{evento.lower()}
+            AFTER {evento} ON configuracoes
+            BEGIN
+                UPDATE versao_configuracoes SET versao = versao + 1 WHERE id = 1;
+            END
+        """)
+
+
+# Migrações do esquema, em ordem: a de índice i leva o banco à versão i + 1
+# (PRAGMA user_version). Novas tabelas, colunas e índices entram sempre no fim
+# da lista. As migrações usam IF NOT EXISTS / _garantir_colunas, pois bancos
+# anteriores ao versionamento (versão 0) já podem ter parte do esquema.
+MIGRACOES = [
+    _migracao_esquema_inicial,
+    _migracao_identidade_arquivos,
+    _migracao_certificados,
+    _migracao_snapshots,
+    _migracao_fila_varredura,
+    _migracao_indice_notificacoes,
+    _migracao_versao_configuracoes,
+]
+
+# Configurações criadas com o valor padrão quando ainda não existem
+CONFIGURACOES_PADRAO = [
+    ("smtp_email", ""),
+    ("smtp_senha", ""),
+    ("dias_notificacao", "30"),
+    ("notificacao_automatica", "false"),
+    ("nome_escritorio", "Escritório de Contabilidade"),
+    ("processos_leitura", "0"),
+    ("prazo_leitura", "10"),
+    ("senhas_alternativas", ""),
+    ("aquecimento_inicializacao", "true"),
+]
+
+_bancos_preparados: Set[str] = set()
+_preparacao_lock = threading.Lock()
+
+
+def _migrar(conn: sqlite3.Connection):
+    """
+    Aplica as migrações pendentes e as configurações padrão em uma única
+    transação (BEGIN IMMEDIATE: outro processo que migre ao mesmo tempo
+    espera e encontra o banco já migrado).
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+            migracao(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+        
+        cursor.executemany("""
+            INSERT OR IGNORE INTO configuracoes (chave, valor) VALUES (?, ?)
+        """, CONFIGURACOES_PADRAO)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _preparar_banco(conn: sqlite3.Connection):
+    """Migra o banco em DB_PATH na primeira conexão do processo (depois não faz nada)."""
+    with _preparacao_lock:
+        if DB_PATH in _bancos_preparados:
+            return
+        _migrar(conn)
+        _bancos_preparados.add(DB_PATH)
+
+
+def init_database():
+    """
+    Garante que o banco esteja criado e migrado para a versão atual do
+    esquema. Não é necessário chamá-la: a primeira conexão do processo
+    (get_connection) já faz isso.
+    """
+    get_connection()
 
 
 # ==================== FUNÇÕES DE CLIENTES ====================
@@ -152,6 +401,124 @@ def salvar_cliente(
         return False
 
 
+# Linhas do CSV gravadas por executemany (cada bloco tem um savepoint próprio)
+TAMANHO_BLOCO_IMPORTACAO = 2000
+
+# Colunas do CSV de cadastros (a de código é obrigatória)
+COLUNAS_CADASTRO = ["codigo", "razao_social", "email", "telefone", "responsavel", "observacoes"]
+
+
+def _gravar_bloco_clientes(cursor: sqlite3.Cursor, bloco: List[tuple], erros: List[Dict[str, Any]]) -> int:
+    """
+    Grava um bloco de (linha, valores) com INSERT ... ON CONFLICT DO UPDATE.
+    Se o bloco falhar, desfaz só o bloco e grava linha a linha para
+    identificar as linhas com erro. Retorna quantas linhas foram gravadas.
+    """
+    sql = """
+        INSERT INTO clientes (codigo, razao_social, email, telefone, responsavel, observacoes)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(codigo) DO UPDATE SET
+            razao_social = excluded.razao_social, email = excluded.email,
+            telefone = excluded.telefone, responsavel = excluded.responsavel,
+            observacoes = excluded.observacoes, data_atualizacao = ?
+    """
+    agora = datetime.now().isoformat()
+    
+    cursor.execute("SAVEPOINT bloco_importacao")
+    try:
+        cursor.executemany(sql, [valores + (agora,) for _, valores in bloco])
+        cursor.execute("RELEASE bloco_importacao")
+        return len(bloco)
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK TO bloco_importacao")
+    
+    gravadas = 0
+    for linha, valores in bloco:
+        try:
+            cursor.execute(sql, valores + (agora,))
+            gravadas += 1
+        except sqlite3.Error as e:
+            erros.append({"linha": linha, "codigo": valores[0], "mensagem": str(e)})
+    cursor.execute("RELEASE bloco_importacao")
+    return gravadas
+
+
+def importar_clientes_csv(
+    arquivo: IO,
+    tamanho_bloco: int = TAMANHO_BLOCO_IMPORTACAO
+) -> Dict[str, Any]:
+    """
+    Importa (insere ou atualiza pelo código) os clientes de um CSV com as
+    colunas de COLUNAS_CADASTRO, em uma única transação. O arquivo (texto ou
+    binário UTF-8) é lido em blocos de `tamanho_bloco` linhas, gravados com
+    executemany; valores vazios ficam nulos e o código é mantido como texto
+    (zeros à esquerda preservados).
+    
+    Retorna {'total', 'importados', 'erros'}, com cada erro como
+    {'linha', 'codigo', 'mensagem'} (linha do arquivo, contando o cabeçalho).
+    Um erro em uma linha não impede a importação das demais.
+    """
+    if isinstance(arquivo, io.TextIOBase):
+        return _importar_clientes(arquivo, tamanho_bloco)
+    
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    try:
+        return _importar_clientes(texto, tamanho_bloco)
+    finally:
+        # Não fecha o arquivo binário recebido junto com o wrapper
+        texto.detach()
+
+
+def _importar_clientes(arquivo: IO[str], tamanho_bloco: int) -> Dict[str, Any]:
+    """Implementação de importar_clientes_csv sobre um arquivo de texto."""
+    resultado = {"total": 0, "importados": 0, "erros": []}
+    leitor = csv.DictReader(arquivo)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        # O cabeçalho é o primeiro trecho decodificado do arquivo
+        colunas = [coluna.strip().lower() for coluna in (leitor.fieldnames or [])]
+        if "codigo" not in colunas:
+            conn.close()
+            resultado["erros"].append({"linha": 1, "codigo": None, "mensagem": "Coluna 'codigo' não encontrada"})
+            return resultado
+        leitor.fieldnames = colunas
+        
+        cursor.execute("BEGIN")
+        bloco = []
+        for registro in leitor:
+            resultado["total"] += 1
+            linha = leitor.line_num
+            valores = tuple(
+                (registro.get(coluna) or "").strip() or None for coluna in COLUNAS_CADASTRO
+            )
+            
+            if not valores[0]:
+                resultado["erros"].append({"linha": linha, "codigo": None, "mensagem": "Código vazio"})
+                continue
+            
+            # razao_social é obrigatória na tabela; vazia é gravada como texto vazio
+            bloco.append((linha, (valores[0], valores[1] or "") + valores[2:]))
+            if len(bloco) >= tamanho_bloco:
+                resultado["importados"] += _gravar_bloco_clientes(cursor, bloco, resultado["erros"])
+                bloco = []
+        
+        if bloco:
+            resultado["importados"] += _gravar_bloco_clientes(cursor, bloco, resultado["erros"])
+        conn.commit()
+        conn.close()
+    except (csv.Error, UnicodeDecodeError, sqlite3.Error) as e:
+        # Arquivo malformado ou banco indisponível: nada é gravado
+        conn.rollback()
+        conn.close()
+        resultado["importados"] = 0
+        resultado["erros"].append({"linha": leitor.line_num or 1, "codigo": None, "mensagem": f"Erro na importação: {e}"})
+    
+    return resultado
+
+
 def deletar_cliente(codigo: str) -> bool:
     """Deleta um cliente pelo código."""
     conn = get_connection()
@@ -169,30 +536,45 @@ def deletar_cliente(codigo: str) -> bool:
 
 # ==================== FUNÇÕES DE CONFIGURAÇÕES ====================
 
-def get_configuracao(chave: str) -> Optional[str]:
-    """Busca uma configuração pelo nome da chave."""
+# Configurações do processo em memória: (DB_PATH, versão, configurações)
+_cache_configuracoes: Optional[tuple] = None
+
+
+def _get_configuracoes_cache() -> Dict[str, str]:
+    """
+    Configurações servidas da memória enquanto a versão em
+    versao_configuracoes não mudar. A gravação de outro processo (ou de outra
+    thread) incrementa a versão, e a próxima leitura recarrega a tabela.
+    O PRAGMA data_version não serve aqui: vale por conexão, e as conexões são
+    por thread (o Streamlit usa uma thread nova a cada execução da página).
+    """
+    global _cache_configuracoes
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (chave,))
-    row = cursor.fetchone()
+    # A versão é lida antes das configurações: uma gravação entre as duas
+    # consultas só faz a próxima leitura recarregar de novo
+    cursor.execute("SELECT versao FROM versao_configuracoes WHERE id = 1")
+    versao = cursor.fetchone()["versao"]
+    cache = _cache_configuracoes
+    
+    if cache is None or cache[0] != DB_PATH or cache[1] != versao:
+        cursor.execute("SELECT chave, valor FROM configuracoes")
+        cache = (DB_PATH, versao, {row["chave"]: row["valor"] for row in cursor.fetchall()})
+        _cache_configuracoes = cache
     conn.close()
     
-    if row:
-        return row["valor"]
-    return None
+    return cache[2]
+
+
+def get_configuracao(chave: str) -> Optional[str]:
+    """Busca uma configuração pelo nome da chave."""
+    return _get_configuracoes_cache().get(chave)
 
 
 def get_todas_configuracoes() -> Dict[str, str]:
     """Retorna todas as configurações como dicionário."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT chave, valor FROM configuracoes")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return {row["chave"]: row["valor"] for row in rows}
+    return dict(_get_configuracoes_cache())
 
 
 def salvar_configuracao(chave: str, valor: str) -> bool:
@@ -230,6 +612,538 @@ def salvar_configuracoes(configs: Dict[str, str]) -> bool:
         return False
 
 
+# ==================== FUNÇÕES DE CACHE DE LEITURA / ÍNDICE DA PASTA ====================
+
+def get_cache_leituras(pasta: str) -> Dict[str, Dict[str, Any]]:
+    """Retorna as leituras em cache de uma pasta, indexadas pelo nome do arquivo."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT arquivo, tamanho, mtime_ns, vencimento, status, erro, inode, hash_conteudo, thumbprint,
+               senha_alternativa
+        FROM cache_leituras WHERE pasta = ?
+    """, (pasta,))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return {row["arquivo"]: dict(row) for row in rows}
+
+
+def _gravar_leituras(cursor: sqlite3.Cursor, pasta: str, leituras: List[Dict[str, Any]]):
+    """Grava (INSERT OR REPLACE) as leituras no cache usando o cursor informado."""
+    cursor.executemany("""
+        INSERT OR REPLACE INTO cache_leituras
+            (pasta, arquivo, tamanho, mtime_ns, vencimento, status, erro, data_leitura,
+             inode, hash_conteudo, thumbprint, senha_alternativa)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (pasta, l["arquivo"], l["tamanho"], l["mtime_ns"], l["vencimento"],
+         l["status"], l["erro"], datetime.now().isoformat(),
+         l.get("inode"), l.get("hash_conteudo"), l.get("thumbprint"), l.get("senha_alternativa"))
+        for l in leituras
+    ])
+
+
+def salvar_cache_leituras(pasta: str, leituras: List[Dict[str, Any]]) -> bool:
+    """
+    Salva ou atualiza as leituras de arquivos de uma pasta no cache.
+    Cada leitura deve conter: arquivo, tamanho, mtime_ns, vencimento, status e erro
+    (inode, hash_conteudo, thumbprint e senha_alternativa são opcionais).
+    """
+    if not leituras:
+        return True
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        _gravar_leituras(cursor, pasta, leituras)
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def remover_cache_ausentes(pasta: str, arquivos_presentes: List[str]) -> bool:
+    """Remove do cache as leituras de arquivos que não existem mais na pasta."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT arquivo FROM cache_leituras WHERE pasta = ?", (pasta,))
+        presentes = set(arquivos_presentes)
+        ausentes = [(pasta, row["arquivo"]) for row in cursor.fetchall() if row["arquivo"] not in presentes]
+        cursor.executemany("DELETE FROM cache_leituras WHERE pasta = ? AND arquivo = ?", ausentes)
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def get_arquivos_duplicados(pasta: str) -> List[Dict[str, Any]]:
+    """
+    Retorna os grupos de arquivos da pasta com conteúdo idêntico (mesmo hash),
+    cada um como {'hash_conteudo', 'arquivos', 'status'}, do maior grupo para
+    o menor. 'status' traz o status da leitura de cada arquivo do grupo: uma
+    cópia cuja senha do nome não abre o conteúdo fica com 'Erro na leitura'.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT hash_conteudo, arquivo, status FROM cache_leituras
+        WHERE pasta = ? AND hash_conteudo IN (
+            SELECT hash_conteudo FROM cache_leituras
+            WHERE pasta = ? AND hash_conteudo IS NOT NULL
+            GROUP BY hash_conteudo HAVING COUNT(*) > 1
+        )
+        ORDER BY hash_conteudo, arquivo
+    """, (pasta, pasta))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    grupos: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        grupo = grupos.setdefault(row["hash_conteudo"], {
+            "hash_conteudo": row["hash_conteudo"], "arquivos": [], "status": []
+        })
+        grupo["arquivos"].append(row["arquivo"])
+        grupo["status"].append(row["status"])
+    
+    return sorted(grupos.values(), key=lambda grupo: -len(grupo["arquivos"]))
+
+
+def limpar_cache_erros() -> bool:
+    """
+    Remove do cache as leituras com erro (cache negativo) de todas as pastas,
+    para que esses arquivos sejam tentados de novo na próxima varredura.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM cache_leituras WHERE status != 'OK'")
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+# ==================== FUNÇÕES DE CHECKPOINT DE VARREDURA ====================
+
+def get_varredura(pasta: str) -> Optional[Dict[str, Any]]:
+    """Retorna o checkpoint da última varredura da pasta."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT * FROM varreduras WHERE pasta = ?", (pasta,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if row:
+        return dict(row)
+    return None
+
+
+def salvar_snapshot_varredura(pasta: str, total: int, dados: bytes) -> bool:
+    """Grava (substitui) o snapshot da última varredura completa da pasta."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            INSERT OR REPLACE INTO snapshots_varredura (pasta, total, dados, salvo_em)
+            VALUES (?, ?, ?, ?)
+        """, (pasta, total, dados, datetime.now().isoformat()))
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def get_snapshot_varredura(pasta: str) -> Optional[Dict[str, Any]]:
+    """Retorna o snapshot da última varredura completa da pasta (total, dados e salvo_em)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT total, dados, salvo_em FROM snapshots_varredura WHERE pasta = ?", (pasta,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    
+    if row:
+        return dict(row)
+    return None
+
+
+def iniciar_varredura(pasta: str, total: int) -> bool:
+    """Registra o início de uma varredura (zera o checkpoint da pasta)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        agora = datetime.now().isoformat()
+        cursor.execute("""
+            INSERT OR REPLACE INTO varreduras
+                (pasta, total, processados, iniciada_em, atualizada_em, concluida_em)
+            VALUES (?, ?, 0, ?, ?, NULL)
+        """, (pasta, total, agora, agora))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def salvar_checkpoint_varredura(pasta: str, leituras: List[Dict[str, Any]], processados: int) -> bool:
+    """
+    Grava um lote de leituras no cache e o progresso da varredura na mesma
+    transação, para que uma varredura interrompida possa ser retomada.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        _gravar_leituras(cursor, pasta, leituras)
+        cursor.execute("""
+            UPDATE varreduras SET processados = ?, atualizada_em = ? WHERE pasta = ?
+        """, (processados, datetime.now().isoformat(), pasta))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def concluir_varredura(pasta: str, processados: int) -> bool:
+    """Marca a varredura da pasta como concluída."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        agora = datetime.now().isoformat()
+        cursor.execute("""
+            UPDATE varreduras SET processados = ?, atualizada_em = ?, concluida_em = ?
+            WHERE pasta = ?
+        """, (processados, agora, agora, pasta))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+# ==================== FUNÇÕES DA FILA DE VARREDURA ====================
+
+def criar_jobs_varredura(pasta: str, lotes: List[List[str]]) -> bool:
+    """
+    Substitui a fila de varredura da pasta por um job por lote de arquivos.
+    Jobs anteriores da pasta (de qualquer status) são descartados.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        agora = time.time()
+        cursor.execute("DELETE FROM scan_jobs WHERE pasta = ?", (pasta,))
+        cursor.executemany("""
+            INSERT INTO scan_jobs (pasta, arquivos, criado_em) VALUES (?, ?, ?)
+        """, [(pasta, json.dumps(lote, ensure_ascii=False), agora) for lote in lotes])
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def reservar_job_varredura(
+    worker: str,
+    duracao_lease: float,
+    maximo_tentativas: int,
+    pasta: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Reserva o próximo job da fila (pendente ou com lease vencido) para o
+    worker. Retorna {'id', 'pasta', 'arquivos'} ou None se não houver job.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        agora = time.time()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            UPDATE scan_jobs SET status = 'falhou', worker = NULL, lease_ate = NULL
+            WHERE status = 'em_execucao' AND lease_ate < ? AND tentativas >= ?
+        """, (agora, maximo_tentativas))
+        
+        cursor.execute("""
+            SELECT id, pasta, arquivos FROM scan_jobs
+            WHERE (status = 'pendente' OR (status = 'em_execucao' AND lease_ate < ?))
+              AND (? IS NULL OR pasta = ?)
+            ORDER BY id LIMIT 1
+        """, (agora, pasta, pasta))
+        row = cursor.fetchone()
+        
+        if row:
+            cursor.execute("""
+                UPDATE scan_jobs
+                SET status = 'em_execucao', worker = ?, lease_ate = ?, tentativas = tentativas + 1
+                WHERE id = ?
+            """, (worker, agora + duracao_lease, row["id"]))
+        conn.commit()
+        conn.close()
+    except Exception:
+        conn.close()
+        return None
+    
+    if row:
+        return {"id": row["id"], "pasta": row["pasta"], "arquivos": json.loads(row["arquivos"])}
+    return None
+
+
+def renovar_lease_job(id_job: int, worker: str, duracao_lease: float) -> bool:
+    """Estende o lease do job; retorna False se o job não está mais com o worker."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            UPDATE scan_jobs SET lease_ate = ?
+            WHERE id = ? AND worker = ? AND status = 'em_execucao'
+        """, (time.time() + duracao_lease, id_job, worker))
+        renovado = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return renovado
+    except Exception:
+        conn.close()
+        return False
+
+
+def concluir_job_varredura(id_job: int, worker: str) -> bool:
+    """Marca o job como concluído (só se ainda estiver reservado para o worker)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            UPDATE scan_jobs SET status = 'concluido', lease_ate = NULL, concluido_em = ?
+            WHERE id = ? AND worker = ? AND status = 'em_execucao'
+        """, (time.time(), id_job, worker))
+        concluido = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return concluido
+    except Exception:
+        conn.close()
+        return False
+
+
+def get_progresso_fila(pasta: str) -> Dict[str, Any]:
+    """
+    Retorna o progresso da fila de varredura da pasta: total, pendentes,
+    em_execucao, abandonados, concluidos, falhos, restantes (pendentes + em
+    execução), workers (ativos), parada e concluida_em (instante do último
+    job concluído, só quando não há jobs restantes).
+    
+    Jobs em execução com o lease vencido são abandonados: contam como
+    pendentes (voltam a ser reservados) e não como em execução. A fila está
+    parada quando há jobs abandonados e nenhum worker ativo.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT
+            COUNT(*) AS total,
+            COALESCE(SUM(status = 'pendente'), 0) AS pendentes,
+            COALESCE(SUM(status = 'em_execucao' AND lease_ate >= :agora), 0) AS em_execucao,
+            COALESCE(SUM(status = 'em_execucao' AND lease_ate < :agora), 0) AS abandonados,
+            COALESCE(SUM(status = 'concluido'), 0) AS concluidos,
+            COALESCE(SUM(status = 'falhou'), 0) AS falhos,
+            COUNT(DISTINCT CASE WHEN status = 'em_execucao' AND lease_ate >= :agora THEN worker END) AS workers,
+            MAX(concluido_em) AS concluida_em
+        FROM scan_jobs WHERE pasta = :pasta
+    """, {"agora": time.time(), "pasta": pasta})
+    progresso = dict(cursor.fetchone())
+    conn.close()
+    
+    progresso["pendentes"] += progresso["abandonados"]
+    progresso["restantes"] = progresso["pendentes"] + progresso["em_execucao"]
+    progresso["parada"] = bool(progresso["abandonados"]) and not progresso["workers"]
+    if progresso["restantes"]:
+        progresso["concluida_em"] = None
+    return progresso
+
+
+# ==================== FUNÇÕES DE CERTIFICADOS ====================
+
+def _data_sql(data: datetime) -> str:
+    """Formata uma data no padrão da coluna certificados.vencimento (UTC)."""
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc)
+    return data.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _limite_dias(agora: datetime, dias: int) -> str:
+    """
+    Limite (exclusivo) de vencimento para "vence em até N dias", com os dias
+    contados como em (vencimento - agora).days.
+    """
+    return _data_sql(agora + timedelta(days=dias + 1))
+
+
+def _linha_certificado(row: sqlite3.Row, agora: datetime) -> Dict[str, Any]:
+    """Converte uma linha da tabela certificados, calculando os dias para vencer."""
+    certificado = dict(row)
+    vencimento = datetime.fromisoformat(certificado["vencimento"])
+    certificado["vencimento"] = vencimento.replace(tzinfo=timezone.utc)
+    certificado["dias_para_vencer"] = (certificado["vencimento"] - agora).days
+    return certificado
+
+
+def salvar_certificados(
+    pasta: str,
+    certificados: List[Any],
+    arquivos_mantidos: List[str]
+) -> bool:
+    """
+    Grava os certificados lidos de uma pasta (scanner.CertificadoRecord, com
+    arquivo, codigo, cliente, vencimento como datetime e thumbprint).
+    Remove os certificados de arquivos que não estão em `certificados` nem em
+    `arquivos_mantidos` (arquivos da pasta que não puderam ser lidos agora).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.executemany("""
+            INSERT OR REPLACE INTO certificados
+                (pasta, arquivo, codigo, cliente, vencimento, thumbprint)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (pasta, c.arquivo, c.codigo, c.cliente, _data_sql(c.vencimento), c.thumbprint)
+            for c in certificados
+        ])
+        
+        presentes = {c.arquivo for c in certificados} | set(arquivos_mantidos)
+        cursor.execute("SELECT arquivo FROM certificados WHERE pasta = ?", (pasta,))
+        ausentes = [(pasta, row["arquivo"]) for row in cursor.fetchall() if row["arquivo"] not in presentes]
+        cursor.executemany("DELETE FROM certificados WHERE pasta = ? AND arquivo = ?", ausentes)
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        conn.close()
+        return False
+
+
+def get_contagem_status_certificados(
+    pasta: str,
+    dias_atencao: int = 30,
+    agora: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Conta os certificados da pasta por status ('Vencido', 'Atenção' e 'Válido'),
+    com consultas por faixa de vencimento no índice.
+    """
+    if agora is None:
+        agora = datetime.now(timezone.utc)
+    hoje = _data_sql(agora)
+    limite = _limite_dias(agora, dias_atencao)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM certificados
+             WHERE pasta = ? AND vencimento < ?) AS vencidos,
+            (SELECT COUNT(*) FROM certificados
+             WHERE pasta = ? AND vencimento >= ? AND vencimento < ?) AS atencao,
+            (SELECT COUNT(*) FROM certificados
+             WHERE pasta = ? AND vencimento >= ?) AS validos
+    """, (pasta, hoje, pasta, hoje, limite, pasta, limite))
+    row = cursor.fetchone()
+    conn.close()
+    
+    return {"Vencido": row["vencidos"], "Atenção": row["atencao"], "Válido": row["validos"]}
+
+
+def get_certificados_vencendo(
+    pasta: str,
+    dias: int,
+    incluir_vencidos: bool = True,
+    agora: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retorna os certificados da pasta que vencem em até `dias` dias, do
+    vencimento mais antigo ao mais recente, com 'dias_para_vencer' calculado.
+    """
+    if agora is None:
+        agora = datetime.now(timezone.utc)
+    inicio = "" if incluir_vencidos else _data_sql(agora)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT codigo, cliente, vencimento, thumbprint FROM certificados
+        WHERE pasta = ? AND vencimento >= ? AND vencimento < ?
+        ORDER BY vencimento, codigo
+    """, (pasta, inicio, _limite_dias(agora, dias)))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [_linha_certificado(row, agora) for row in rows]
+
+
+def get_certificados_elegiveis(
+    pasta: str,
+    dias_limite: int,
+    agora: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retorna os certificados da pasta que vencem em até `dias_limite` dias
+    (inclusive os vencidos) cujo cliente tem email cadastrado.
+    """
+    if agora is None:
+        agora = datetime.now(timezone.utc)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT c.codigo, c.cliente, c.vencimento, c.thumbprint, cl.email
+        FROM certificados c
+        JOIN clientes cl ON cl.codigo = c.codigo
+        WHERE c.pasta = ? AND c.vencimento < ?
+          AND cl.email IS NOT NULL AND cl.email != ''
+        ORDER BY c.vencimento, c.codigo
+    """, (pasta, _limite_dias(agora, dias_limite)))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [_linha_certificado(row, agora) for row in rows]
+
+
 # ==================== FUNÇÕES DE CRIPTOGRAFIA SIMPLES ====================
 
 def encode_senha(senha: str) -> str:
@@ -293,22 +1207,63 @@ def get_ultima_notificacao(codigo_cliente: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+def get_ultimas_notificacoes() -> Dict[str, str]:
+    """
+    Retorna a data do último envio com sucesso de cada cliente
+    ({codigo_cliente: data_envio}), em uma única consulta agrupada sobre o
+    índice idx_notificacoes_cliente_envio.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT codigo_cliente, MAX(data_envio) AS data_envio
+        FROM notificacoes
+        WHERE sucesso = 1
+        GROUP BY codigo_cliente
+    """)
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return {row["codigo_cliente"]: row["data_envio"] for row in rows}
+
+
+def _enviada_desde(data_envio: Optional[str], limite: datetime) -> bool:
+    """Indica se a notificação enviada em `data_envio` é posterior ao limite."""
+    if not data_envio:
+        return False
+    
+    try:
+        return datetime.fromisoformat(data_envio) >= limite
+    except Exception:
+        return False
+
+
+def get_clientes_notificados(dias_espera: int = 7) -> Set[str]:
+    """
+    Retorna os códigos dos clientes que já receberam notificação nos últimos
+    X dias (os que pode_enviar_notificacao recusaria), com uma única consulta.
+    """
+    limite = datetime.now() - timedelta(days=dias_espera)
+    return {
+        codigo for codigo, data_envio in get_ultimas_notificacoes().items()
+        if _enviada_desde(data_envio, limite)
+    }
+
+
 def pode_enviar_notificacao(codigo_cliente: str, dias_espera: int = 7) -> bool:
     """
     Verifica se pode enviar notificação para o cliente.
     Retorna False se já foi enviada uma notificação nos últimos X dias.
+    Para vários clientes, use get_clientes_notificados.
     """
     ultima = get_ultima_notificacao(codigo_cliente)
     
     if not ultima:
         return True
     
-    try:
-        data_envio = datetime.fromisoformat(ultima["data_envio"])
-        limite = datetime.now() - timedelta(days=dias_espera)
-        return data_envio < limite
-    except Exception:
-        return True
+    limite = datetime.now() - timedelta(days=dias_espera)
+    return not _enviada_desde(ultima["data_envio"], limite)
 
 
 def get_historico_notificacoes(limite: int = 100) -> List[Dict[str, Any]]:
@@ -360,6 +1315,3 @@ def get_estatisticas() -> Dict[str, int]:
         "notificacoes_mes": notificacoes_mes
     }
 
-
-# Inicializa o banco ao importar o módulo
-init_database()
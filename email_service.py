@@ -7,9 +7,10 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
 
 import database as db
+from scanner import CertificadoRecord, StatusLeitura
 
 
 def get_email_template_html(
@@ -266,14 +267,14 @@ def enviar_notificacao(
 
 
 def processar_notificacoes_automaticas(
-    certificados: List[Dict[str, Any]],
+    certificados: List[CertificadoRecord],
     dias_limite: int = 30
 ) -> Dict[str, Any]:
     """
     Processa e envia notificações automáticas para certificados próximos ao vencimento.
     
     Args:
-        certificados: Lista de certificados com dados do DataFrame
+        certificados: Registros da última varredura da pasta
         dias_limite: Enviar para certificados que vencem em até X dias
         
     Returns:
@@ -297,25 +298,28 @@ def processar_notificacoes_automaticas(
     if not configs.get("smtp_email") or not configs.get("smtp_senha"):
         return resultados
     
+    agora = datetime.now(timezone.utc)
+    clientes = {cliente["codigo"]: cliente for cliente in db.get_todos_clientes()}
+    notificados = db.get_clientes_notificados()
+    
     for cert in certificados:
-        codigo = cert.get("Código", "")
-        cliente_nome = cert.get("Cliente", "")
-        dias_para_vencer = cert.get("Dias para Vencer")
-        vencimento = cert.get("Vencimento", "")
-        status = cert.get("Status", "")
-        
-        # Ignora certificados com erro
-        if "Erro" in status:
+        # Ignora certificados com erro ou que não foram lidos (Timeout)
+        if cert.status is not StatusLeitura.OK or cert.vencimento is None:
             continue
         
         # Verifica se está dentro do limite de dias
-        if dias_para_vencer is None or dias_para_vencer > dias_limite:
+        dias_para_vencer = (cert.vencimento - agora).days
+        if dias_para_vencer > dias_limite:
             continue
         
+        codigo = cert.codigo
+        cliente_nome = cert.cliente
+        vencimento = cert.vencimento.strftime("%d/%m/%Y")
+        
         resultados["total_processados"] += 1
         
-        # Busca dados do cliente no banco
-        cliente = db.get_cliente(codigo)
+        # Dados do cliente (cadastro carregado uma única vez)
+        cliente = clientes.get(codigo)
         
         if not cliente or not cliente.get("email"):
             resultados["ignorados_sem_email"] += 1
@@ -328,7 +332,7 @@ def processar_notificacoes_automaticas(
             continue
         
         # Verifica se já foi enviada notificação recentemente
-        if not db.pode_enviar_notificacao(codigo):
+        if codigo in notificados:
             resultados["ignorados_ja_enviado"] += 1
             resultados["detalhes"].append({
                 "codigo": codigo,
@@ -348,6 +352,7 @@ def processar_notificacoes_automaticas(
         )
         
         if sucesso:
+            notificados.add(codigo)
             resultados["enviados_sucesso"] += 1
             resultados["detalhes"].append({
                 "codigo": codigo,
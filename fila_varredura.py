@@ -0,0 +1,109 @@
+"""
+Fila de varredura do Gerenciador de Certificados: divide a leitura da pasta
+de certificados em lotes (tabela scan_jobs) lidos por vários processos
+worker, no mesmo computador ou em outros que compartilhem a pasta e o banco.
+O dashboard exibe o resultado consolidado quando a fila termina.
+
+Uso:
+    python fila_varredura.py distribuir [--pasta PASTA] [--tamanho-lote N]
+    python fila_varredura.py worker [--pasta PASTA] [--workers N] [--processos N] [--aguardar]
+    python fila_varredura.py status [--pasta PASTA]
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+import database as db
+import scanner
+
+
+def relatar_job(job: dict, lidos: int):
+    """Exibe no console um job concluído pelo worker."""
+    print(f"Job {job['id']}: {lidos} arquivo(s) lidos", flush=True)
+
+
+def rodar_worker(pasta: str, processos: int, aguardar: bool):
+    """Ponto de entrada de um processo worker."""
+    try:
+        concluidos = scanner.executar_worker(pasta, processos, aguardar, ao_concluir_job=relatar_job)
+    except KeyboardInterrupt:
+        return
+    print(f"Worker encerrado: {concluidos} job(s) concluídos", flush=True)
+
+
+def comando_distribuir(args) -> int:
+    inicio = time.perf_counter()
+    try:
+        jobs = scanner.distribuir_varredura(args.pasta, args.tamanho_lote)
+    except OSError as e:
+        print(f"Não foi possível listar a pasta {args.pasta}: {e}", file=sys.stderr)
+        return 1
+    print(f"{jobs} job(s) criados para {args.pasta} em {time.perf_counter() - inicio:.1f} s")
+    if not jobs:
+        scanner.consolidar_varredura(args.pasta)
+        print("Nenhum arquivo a ler: resultado consolidado a partir do cache")
+    return 0
+
+
+def comando_worker(args) -> int:
+    if args.workers <= 1:
+        rodar_worker(args.pasta, args.processos, args.aguardar)
+        return 0
+    
+    workers = [
+        multiprocessing.Process(target=rodar_worker, args=(args.pasta, args.processos, args.aguardar))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+    return 0
+
+
+def comando_status(args) -> int:
+    progresso = db.get_progresso_fila(args.pasta)
+    print(
+        f"{progresso['concluidos']}/{progresso['total']} job(s) concluídos, "
+        f"{progresso['pendentes']} pendente(s), {progresso['em_execucao']} em execução "
+        f"({progresso['workers']} worker(s)), {progresso['falhos']} com falha"
+    )
+    if progresso["parada"]:
+        print(f"{progresso['abandonados']} job(s) abandonado(s) sem worker ativo; execute o comando worker para retomar")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fila de varredura dos certificados digitais")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    
+    distribuir = comandos.add_parser("distribuir", help="Divide os arquivos a ler em jobs")
+    distribuir.add_argument("--tamanho-lote", type=int, default=scanner.TAMANHO_LOTE_FILA)
+    distribuir.set_defaults(executar=comando_distribuir)
+    
+    worker = comandos.add_parser("worker", help="Lê os jobs da fila")
+    worker.add_argument("--workers", type=int, default=1, help="Processos worker neste computador")
+    worker.add_argument("--processos", type=int, default=1, help="Processos de descriptografia por worker")
+    worker.add_argument("--aguardar", action="store_true", help="Continua aguardando novos jobs")
+    worker.set_defaults(executar=comando_worker)
+    
+    status = comandos.add_parser("status", help="Exibe o progresso da fila")
+    status.set_defaults(executar=comando_status)
+    
+    for subparser in (distribuir, worker, status):
+        subparser.add_argument("--pasta", help="Pasta dos certificados (padrão: scanner.CAMINHO_CERTIFICADOS)")
+    
+    args = parser.parse_args(argv)
+    if args.pasta is None:
+        args.pasta = scanner.CAMINHO_CERTIFICADOS
+    return args.executar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,482 @@
+"""
+Leitor rápido de arquivos PKCS#12 (.pfx) para o Gerenciador de Certificados.
+Verifica a senha pelo MAC e descriptografa apenas o SafeBag do certificado,
+sem pagar a derivação de chave da chave privada. Leiautes incomuns caem no
+leitor completo da biblioteca cryptography.
+"""
+
+import hashlib
+import hmac
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives.ciphers import Cipher, modes, algorithms
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+except ImportError:  # cryptography < 43
+    from cryptography.hazmat.primitives.ciphers.algorithms import TripleDES
+
+# OIDs usados no PKCS#12
+OID_DATA = "1.2.840.113549.1.7.1"
+OID_ENCRYPTED_DATA = "1.2.840.113549.1.7.6"
+OID_KEY_BAG = "1.2.840.113549.1.12.10.1.1"
+OID_SHROUDED_KEY_BAG = "1.2.840.113549.1.12.10.1.2"
+OID_CERT_BAG = "1.2.840.113549.1.12.10.1.3"
+OID_X509_CERTIFICATE = "1.2.840.113549.1.9.22.1"
+OID_LOCAL_KEY_ID = "1.2.840.113549.1.9.21"
+OID_PBES2 = "1.2.840.113549.1.5.13"
+OID_PBKDF2 = "1.2.840.113549.1.5.12"
+
+# Algoritmos PBE do PKCS#12: OID -> (cifra, tamanho da chave, tamanho do IV)
+PBE_PKCS12 = {
+    "1.2.840.113549.1.12.1.3": ("3des", 24, 8),  # pbeWithSHAAnd3-KeyTripleDES-CBC
+    "1.2.840.113549.1.12.1.4": ("3des", 16, 8),  # pbeWithSHAAnd2-KeyTripleDES-CBC
+    "1.2.840.113549.1.12.1.5": ("rc2", 16, 8),   # pbeWithSHAAnd128BitRC2-CBC
+    "1.2.840.113549.1.12.1.6": ("rc2", 5, 8),    # pbeWithSHAAnd40BitRC2-CBC
+}
+
+# Cifras do PBES2: OID -> (cifra, tamanho da chave)
+CIFRAS_PBES2 = {
+    "2.16.840.1.101.3.4.1.2": ("aes", 16),
+    "2.16.840.1.101.3.4.1.22": ("aes", 24),
+    "2.16.840.1.101.3.4.1.42": ("aes", 32),
+    "1.2.840.113549.3.7": ("3des", 24),
+}
+
+# Funções de hash (MAC e PRF do PBKDF2): OID -> nome no hashlib
+HASHES = {
+    "1.3.14.3.2.26": "sha1",
+    "2.16.840.1.101.3.4.2.1": "sha256",
+    "2.16.840.1.101.3.4.2.2": "sha384",
+    "2.16.840.1.101.3.4.2.3": "sha512",
+    "1.2.840.113549.2.7": "sha1",
+    "1.2.840.113549.2.9": "sha256",
+    "1.2.840.113549.2.10": "sha384",
+    "1.2.840.113549.2.11": "sha512",
+}
+
+
+class FormatoNaoSuportado(Exception):
+    """Leiaute do PKCS#12 que o leitor rápido não trata (usa o leitor completo)."""
+
+
+# ==================== DECODIFICAÇÃO DER/BER ====================
+
+class _Elemento:
+    """Elemento ASN.1 (TLV) apontando para um trecho do buffer original."""
+    
+    __slots__ = ("tag", "dados", "inicio", "fim")
+    
+    def __init__(self, tag: int, dados: bytes, inicio: int, fim: int):
+        self.tag = tag
+        self.dados = dados
+        self.inicio = inicio
+        self.fim = fim
+    
+    @property
+    def construido(self) -> bool:
+        return bool(self.tag & 0x20)
+    
+    @property
+    def conteudo(self) -> bytes:
+        return self.dados[self.inicio:self.fim]
+    
+    def filhos(self) -> List["_Elemento"]:
+        """Retorna os elementos contidos em um elemento construído."""
+        if not self.construido:
+            raise FormatoNaoSuportado("Elemento ASN.1 primitivo não possui filhos")
+        elementos = []
+        pos = self.inicio
+        while pos < self.fim:
+            elemento, pos = _ler_elemento(self.dados, pos)
+            elementos.append(elemento)
+        return elementos
+    
+    def octetos(self) -> bytes:
+        """Retorna o conteúdo de uma OCTET STRING (primitiva ou construída em BER)."""
+        if not self.construido:
+            return self.conteudo
+        return b"".join(filho.octetos() for filho in self.filhos())
+    
+    def oid(self) -> str:
+        """Decodifica um OBJECT IDENTIFIER para a notação com pontos."""
+        if self.tag != 0x06:
+            raise FormatoNaoSuportado("Esperado OBJECT IDENTIFIER")
+        conteudo = self.conteudo
+        partes = []
+        valor = 0
+        for byte in conteudo:
+            valor = (valor << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                partes.append(valor)
+                valor = 0
+        if not partes:
+            raise FormatoNaoSuportado("OBJECT IDENTIFIER vazio")
+        primeiro = partes[0]
+        cabeca = [min(primeiro // 40, 2), primeiro - 40 * min(primeiro // 40, 2)]
+        return ".".join(str(p) for p in cabeca + partes[1:])
+    
+    def inteiro(self) -> int:
+        if self.tag != 0x02:
+            raise FormatoNaoSuportado("Esperado INTEGER")
+        return int.from_bytes(self.conteudo, "big", signed=True)
+
+
+def _ler_elemento(dados: bytes, pos: int) -> Tuple[_Elemento, int]:
+    """Lê um TLV a partir de `pos` e retorna (elemento, posição após o elemento)."""
+    if pos + 2 > len(dados):
+        raise FormatoNaoSuportado("Estrutura ASN.1 truncada")
+    
+    tag = dados[pos]
+    if tag & 0x1F == 0x1F:
+        raise FormatoNaoSuportado("Tags ASN.1 de vários bytes não são suportadas")
+    
+    tamanho = dados[pos + 1]
+    pos += 2
+    
+    if tamanho == 0x80:
+        # Comprimento indefinido (BER): conteúdo termina no marcador 00 00
+        if not tag & 0x20:
+            raise FormatoNaoSuportado("Comprimento indefinido em elemento primitivo")
+        inicio = pos
+        while True:
+            if pos + 2 > len(dados):
+                raise FormatoNaoSuportado("Estrutura ASN.1 truncada")
+            if dados[pos] == 0 and dados[pos + 1] == 0:
+                return _Elemento(tag, dados, inicio, pos), pos + 2
+            _, pos = _ler_elemento(dados, pos)
+    
+    if tamanho & 0x80:
+        num_bytes = tamanho & 0x7F
+        if num_bytes == 0 or num_bytes > 4 or pos + num_bytes > len(dados):
+            raise FormatoNaoSuportado("Comprimento ASN.1 inválido")
+        tamanho = int.from_bytes(dados[pos:pos + num_bytes], "big")
+        pos += num_bytes
+    
+    if pos + tamanho > len(dados):
+        raise FormatoNaoSuportado("Estrutura ASN.1 truncada")
+    return _Elemento(tag, dados, pos, pos + tamanho), pos + tamanho
+
+
+def _raiz(dados: bytes) -> _Elemento:
+    elemento, _ = _ler_elemento(dados, 0)
+    return elemento
+
+
+def _explicito(elemento: _Elemento) -> _Elemento:
+    """Retorna o único filho de uma tag de contexto [n] EXPLICIT."""
+    filhos = elemento.filhos()
+    if len(filhos) != 1:
+        raise FormatoNaoSuportado("Tag EXPLICIT com conteúdo inesperado")
+    return filhos[0]
+
+
+# ==================== DERIVAÇÃO DE CHAVES E CIFRAS ====================
+
+def _senha_bmp(senha: str) -> bytes:
+    """Codifica a senha como BMPString terminada em zero (RFC 7292, B.1)."""
+    if not senha:
+        return b""
+    return senha.encode("utf-16-be") + b"\x00\x00"
+
+
+def _kdf_pkcs12(nome_hash: str, senha_bmp: bytes, salt: bytes, id_byte: int,
+                iteracoes: int, tamanho: int) -> bytes:
+    """Função de derivação de chaves do PKCS#12 (RFC 7292, apêndice B.2)."""
+    novo_hash = getattr(hashlib, nome_hash)
+    u = novo_hash().digest_size
+    v = novo_hash().block_size
+    
+    def completar(valor: bytes) -> bytes:
+        if not valor:
+            return b""
+        alvo = v * ((len(valor) + v - 1) // v)
+        return (valor * (alvo // len(valor) + 1))[:alvo]
+    
+    D = bytes([id_byte]) * v
+    I = bytearray(completar(salt) + completar(senha_bmp))
+    resultado = b""
+    
+    while True:
+        A = novo_hash(D + bytes(I)).digest()
+        for _ in range(iteracoes - 1):
+            A = novo_hash(A).digest()
+        resultado += A
+        if len(resultado) >= tamanho:
+            return resultado[:tamanho]
+        
+        B = int.from_bytes((A * (v // u + 1))[:v], "big") + 1
+        for j in range(0, len(I), v):
+            bloco = (int.from_bytes(I[j:j + v], "big") + B) % (1 << (v * 8))
+            I[j:j + v] = bloco.to_bytes(v, "big")
+
+
+def _remover_padding(dados: bytes, tamanho_bloco: int) -> bytes:
+    if not dados or len(dados) % tamanho_bloco:
+        raise ValueError("Invalid password or PKCS12 data")
+    n = dados[-1]
+    if n < 1 or n > tamanho_bloco or dados[-n:] != bytes([n]) * n:
+        raise ValueError("Invalid password or PKCS12 data")
+    return dados[:-n]
+
+
+# Tabela PITABLE do RC2 (RFC 2268, seção 2)
+_PITABLE = bytes.fromhex(
+    "d978f9c419ddb5ed28e9fd794aa0d89dc67e37832b76538e624c6488448bfba2"
+    "179a59f587b34f1361456d8d09817d32bd8f40eb86b77b0bf09521225c6b4e82"
+    "54d66593ce60b21c7356c014a78cf1dc1275ca1f3bbee4d1423dd430a33cb626"
+    "6fbf0eda4669075727f21d9bbc944303f811c7f690ef3ee706c3d52fc8661ed7"
+    "08e8eade8052eef784aa72ac354d6a2a961ad2715a1549744b9fd05e0418a4ec"
+    "c2e0416e0f51cbcc2491af50a1f47039997c3a8523b8b47afc02365b25559731"
+    "2d5dfa98e38a92ae05df2910676cbac9d300e6cfe19ea82c6316013f58e289a9"
+    "0d38341bab33ffb0bb480c5fb9b1cd2ec5f3db47e5a59c770aa62068fe7fc1ad"
+)
+
+
+def _rc2_cbc_decifrar(chave: bytes, iv: bytes, dados: bytes) -> bytes:
+    """Decifra RC2-CBC com bits efetivos iguais ao tamanho da chave (RFC 2268)."""
+    t = len(chave)
+    t1 = t * 8
+    t8 = (t1 + 7) // 8
+    tm = 255 % (1 << (8 + t1 - 8 * t8))
+    
+    L = bytearray(128)
+    L[:t] = chave
+    for i in range(t, 128):
+        L[i] = _PITABLE[(L[i - 1] + L[i - t]) % 256]
+    L[128 - t8] = _PITABLE[L[128 - t8] & tm]
+    for i in range(127 - t8, -1, -1):
+        L[i] = _PITABLE[L[i + 1] ^ L[i + t8]]
+    K = [L[2 * i] | (L[2 * i + 1] << 8) for i in range(64)]
+    
+    def decifrar_bloco(bloco: bytes) -> bytes:
+        R = [bloco[2 * i] | (bloco[2 * i + 1] << 8) for i in range(4)]
+        j = 63
+        for rodada in range(16):
+            for i in (3, 2, 1, 0):
+                R[i] = ((R[i] >> (1, 2, 3, 5)[i]) | (R[i] << (16 - (1, 2, 3, 5)[i]))) & 0xFFFF
+                R[i] = (R[i] - K[j] - (R[i - 1] & R[i - 2]) - ((~R[i - 1]) & R[i - 3])) & 0xFFFF
+                j -= 1
+            if rodada in (4, 10):
+                for i in (3, 2, 1, 0):
+                    R[i] = (R[i] - K[R[i - 1] & 63]) & 0xFFFF
+        return b"".join(r.to_bytes(2, "little") for r in R)
+    
+    saida = bytearray()
+    anterior = iv
+    for pos in range(0, len(dados), 8):
+        bloco = dados[pos:pos + 8]
+        claro = decifrar_bloco(bloco)
+        saida += bytes(a ^ b for a, b in zip(claro, anterior))
+        anterior = bloco
+    return bytes(saida)
+
+
+def _decifrar(cifra: str, chave: bytes, iv: bytes, dados: bytes) -> bytes:
+    if cifra == "rc2":
+        if len(dados) % 8:
+            raise ValueError("Invalid password or PKCS12 data")
+        return _remover_padding(_rc2_cbc_decifrar(chave, iv, dados), 8)
+    
+    if cifra == "aes":
+        algoritmo = algorithms.AES(chave)
+    else:
+        if len(chave) == 16:
+            chave = chave + chave[:8]
+        algoritmo = TripleDES(chave)
+    
+    tamanho_bloco = algoritmo.block_size // 8
+    if len(dados) % tamanho_bloco:
+        raise ValueError("Invalid password or PKCS12 data")
+    decifrador = Cipher(algoritmo, modes.CBC(iv)).decryptor()
+    return _remover_padding(decifrador.update(dados) + decifrador.finalize(), tamanho_bloco)
+
+
+def _decifrar_conteudo(algoritmo: _Elemento, dados: bytes, senha: str) -> bytes:
+    """Decifra o conteúdo de um EncryptedData conforme o AlgorithmIdentifier."""
+    partes = algoritmo.filhos()
+    oid = partes[0].oid()
+    
+    if oid in PBE_PKCS12:
+        cifra, tamanho_chave, tamanho_iv = PBE_PKCS12[oid]
+        parametros = partes[1].filhos()
+        salt = parametros[0].octetos()
+        iteracoes = parametros[1].inteiro()
+        senha_bmp = _senha_bmp(senha)
+        chave = _kdf_pkcs12("sha1", senha_bmp, salt, 1, iteracoes, tamanho_chave)
+        iv = _kdf_pkcs12("sha1", senha_bmp, salt, 2, iteracoes, tamanho_iv)
+        return _decifrar(cifra, chave, iv, dados)
+    
+    if oid == OID_PBES2:
+        kdf, esquema = partes[1].filhos()
+        kdf_partes = kdf.filhos()
+        if kdf_partes[0].oid() != OID_PBKDF2:
+            raise FormatoNaoSuportado("KDF do PBES2 não suportada")
+        
+        kdf_parametros = kdf_partes[1].filhos()
+        salt = kdf_parametros[0].octetos()
+        iteracoes = kdf_parametros[1].inteiro()
+        nome_hash = "sha1"
+        for parametro in kdf_parametros[2:]:
+            if parametro.tag == 0x30:
+                prf = parametro.filhos()[0].oid()
+                if prf not in HASHES:
+                    raise FormatoNaoSuportado("PRF do PBKDF2 não suportada")
+                nome_hash = HASHES[prf]
+        
+        esquema_partes = esquema.filhos()
+        oid_cifra = esquema_partes[0].oid()
+        if oid_cifra not in CIFRAS_PBES2:
+            raise FormatoNaoSuportado("Cifra do PBES2 não suportada")
+        cifra, tamanho_chave = CIFRAS_PBES2[oid_cifra]
+        iv = esquema_partes[1].octetos()
+        
+        chave = hashlib.pbkdf2_hmac(nome_hash, senha.encode("utf-8"), salt, iteracoes, tamanho_chave)
+        return _decifrar(cifra, chave, iv, dados)
+    
+    raise FormatoNaoSuportado(f"Algoritmo de cifragem não suportado: {oid}")
+
+
+# ==================== LEITURA DO PKCS#12 ====================
+
+def _verificar_mac(mac_data: _Elemento, auth_safe: bytes, senha: str):
+    """Confere a senha pelo MacData; levanta ValueError se a senha estiver errada."""
+    partes = mac_data.filhos()
+    digest_info = partes[0].filhos()
+    oid_hash = digest_info[0].filhos()[0].oid()
+    if oid_hash not in HASHES:
+        raise FormatoNaoSuportado("Algoritmo do MAC não suportado")
+    nome_hash = HASHES[oid_hash]
+    
+    esperado = digest_info[1].octetos()
+    salt = partes[1].octetos()
+    iteracoes = partes[2].inteiro() if len(partes) > 2 else 1
+    
+    tamanho = getattr(hashlib, nome_hash)().digest_size
+    chave = _kdf_pkcs12(nome_hash, _senha_bmp(senha), salt, 3, iteracoes, tamanho)
+    calculado = hmac.new(chave, auth_safe, nome_hash).digest()
+    
+    if not hmac.compare_digest(calculado, esperado):
+        raise ValueError("Invalid password or PKCS12 data")
+
+
+def _bags(safe_contents: bytes) -> List[Tuple[str, _Elemento, Optional[bytes]]]:
+    """Retorna os SafeBags como (OID, valor, localKeyId)."""
+    bags = []
+    for bag in _raiz(safe_contents).filhos():
+        partes = bag.filhos()
+        local_key_id = None
+        if len(partes) > 2:
+            for atributo in partes[2].filhos():
+                atributo_partes = atributo.filhos()
+                if atributo_partes[0].oid() == OID_LOCAL_KEY_ID:
+                    valores = atributo_partes[1].filhos()
+                    if valores:
+                        local_key_id = valores[0].octetos()
+        bags.append((partes[0].oid(), _explicito(partes[1]), local_key_id))
+    return bags
+
+
+def _ler_certificado_der(pfx_data: bytes, senha: str) -> bytes:
+    """Retorna o DER do certificado associado à chave privada do PKCS#12."""
+    pfx = _raiz(pfx_data).filhos()
+    if len(pfx) < 2 or pfx[0].inteiro() != 3:
+        raise FormatoNaoSuportado("Versão do PKCS#12 não suportada")
+    
+    auth_safe = pfx[1].filhos()
+    if auth_safe[0].oid() != OID_DATA:
+        raise FormatoNaoSuportado("PKCS#12 assinado não é suportado")
+    conteudo = _explicito(auth_safe[1]).octetos()
+    
+    # Sem MAC, a senha só é conferida ao decifrar algum EncryptedData
+    senha_verificada = len(pfx) > 2
+    if senha_verificada:
+        _verificar_mac(pfx[2], conteudo, senha)
+    
+    certificados: List[Tuple[bytes, Optional[bytes]]] = []
+    ids_chaves: List[bytes] = []
+    possui_chave = False
+    
+    for content_info in _raiz(conteudo).filhos():
+        partes = content_info.filhos()
+        tipo = partes[0].oid()
+        
+        if tipo == OID_DATA:
+            safe_contents = _explicito(partes[1]).octetos()
+        elif tipo == OID_ENCRYPTED_DATA:
+            encrypted_data = _explicito(partes[1]).filhos()
+            info = encrypted_data[1].filhos()
+            if info[0].oid() != OID_DATA or len(info) < 3:
+                raise FormatoNaoSuportado("EncryptedData com conteúdo inesperado")
+            safe_contents = _decifrar_conteudo(info[1], info[2].octetos(), senha)
+        else:
+            raise FormatoNaoSuportado(f"ContentInfo não suportado: {tipo}")
+        
+        try:
+            bags = _bags(safe_contents)
+        except FormatoNaoSuportado:
+            if len(pfx) > 2:
+                raise
+            # Sem MAC, lixo após a decifragem indica senha errada
+            raise ValueError("Invalid password or PKCS12 data")
+        
+        if tipo == OID_ENCRYPTED_DATA:
+            senha_verificada = True
+        
+        for oid, valor, local_key_id in bags:
+            if oid == OID_CERT_BAG:
+                cert_bag = valor.filhos()
+                if cert_bag[0].oid() == OID_X509_CERTIFICATE:
+                    certificados.append((_explicito(cert_bag[1]).octetos(), local_key_id))
+            elif oid in (OID_KEY_BAG, OID_SHROUDED_KEY_BAG):
+                possui_chave = True
+                if local_key_id is not None:
+                    ids_chaves.append(local_key_id)
+    
+    if not senha_verificada:
+        raise FormatoNaoSuportado("Senha só pode ser conferida pela chave privada")
+    
+    # Assim como o leitor completo, sem chave privada não há certificado principal
+    if not possui_chave:
+        raise ValueError("PKCS12 sem certificado")
+    
+    associados = [der for der, local_key_id in certificados
+                  if local_key_id is not None and local_key_id in ids_chaves]
+    if len(associados) == 1:
+        return associados[0]
+    raise FormatoNaoSuportado("Não foi possível identificar o certificado da chave")
+
+
+def _ler_completo(pfx_data: bytes, senha: str) -> x509.Certificate:
+    """Lê o certificado com o leitor completo da biblioteca cryptography."""
+    _, certificado, _ = pkcs12.load_key_and_certificates(pfx_data, senha.encode("utf-8"))
+    if certificado is None:
+        raise ValueError("PKCS12 sem certificado")
+    return certificado
+
+
+def ler_certificado_pfx(pfx_data: bytes, senha: str) -> x509.Certificate:
+    """
+    Retorna o certificado principal de um PKCS#12 sem decifrar a chave privada.
+    Levanta ValueError para senha incorreta e usa o leitor completo da
+    biblioteca cryptography quando o leiaute não é suportado.
+    """
+    try:
+        der = _ler_certificado_der(pfx_data, senha)
+    except (FormatoNaoSuportado, IndexError, TypeError):
+        return _ler_completo(pfx_data, senha)
+    except ValueError:
+        # Para senhas não ASCII o OpenSSL também tenta outras codificações
+        if senha.isascii():
+            raise
+        return _ler_completo(pfx_data, senha)
+    
+    return x509.load_der_x509_certificate(der)
+
+
+def ler_vencimento_pfx(pfx_data: bytes, senha: str) -> datetime:
+    """Retorna a data de vencimento (notAfter, UTC) do certificado de um PKCS#12."""
+    return ler_certificado_pfx(pfx_data, senha).not_valid_after_utc
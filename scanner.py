@@ -0,0 +1,1301 @@
+"""
+Módulo de leitura dos certificados digitais (.pfx) para o Gerenciador de Certificados.
+Motor único de varredura: indexa a pasta, compara o índice com a varredura
+anterior, abre apenas os arquivos PKCS#12 alterados (via pfx_reader) e distribui
+a descriptografia entre vários processos.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import socket
+import threading
+import time
+import warnings
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, Iterator, NamedTuple, Set
+
+import numpy as np
+import pandas as pd
+from cryptography.hazmat.primitives import hashes
+
+import database as db
+import pfx_reader
+
+# Suprime warnings de parsing BER/DER da biblioteca cryptography
+warnings.filterwarnings("ignore", message=".*PKCS#12 bundle could not be parsed as DER.*")
+
+# Caminho fixo da pasta de certificados (usado pelo app e pelos scripts de linha de comando)
+CAMINHO_CERTIFICADOS = r"G:\Drives compartilhados\CERTIFICADOS DIGITAIS"
+
+# Colunas do DataFrame de certificados exibido no dashboard
+COLUNAS = ['Código', 'Cliente', 'Vencimento', 'Dias para Vencer', 'Status']
+
+# Colunas do resultado guardado de uma varredura (só dados absolutos); 'Data
+# Vencimento' é o vencimento já formatado (dd/mm/aaaa), que não muda com o dia
+COLUNAS_BASE = ['Código', 'Cliente', 'Vencimento', 'Data Vencimento', 'Leitura']
+
+# Até quantos dias para vencer o certificado fica com status 'Atenção'
+DIAS_ATENCAO = 30
+
+# Abaixo desta quantidade de arquivos pendentes não compensa criar o pool de processos
+MINIMO_ARQUIVOS_PARALELO = 8
+
+# Quantidade de leituras novas gravadas por checkpoint da varredura
+TAMANHO_LOTE_CHECKPOINT = 50
+
+# Leituras de arquivo simultâneas (threads de E/S)
+THREADS_LEITURA = 8
+
+# Prazo padrão, em segundos, para a leitura de um arquivo (pastas de rede/nuvem)
+PRAZO_LEITURA_PADRAO = 10.0
+
+# Threads de leitura abandonadas (travadas além do prazo) toleradas no processo
+MAXIMO_LEITURAS_TRAVADAS = 32
+
+_leituras_travadas: Set[threading.Thread] = set()
+_travadas_lock = threading.Lock()
+
+
+class StatusLeitura(str, Enum):
+    """Resultado da leitura de um arquivo .pfx (o valor é o texto exibido)."""
+    OK = 'OK'
+    NOME_INVALIDO = 'Erro: Nome inválido'
+    ERRO_LEITURA = 'Erro na leitura'
+    TIMEOUT = 'Timeout'
+
+
+# Status dos arquivos que não foram lidos (prazo esgotado ou erro de E/S)
+STATUS_TIMEOUT = StatusLeitura.TIMEOUT.value
+ERRO_TIMEOUT = 'Tempo de leitura esgotado'
+ERRO_NOME_INVALIDO = 'Nome fora do padrão "CÓDIGO - RAZÃO SOCIAL Senha SENHA.pfx"'
+
+# Resultados da leitura de um arquivo e status exibidos no dashboard (categorias)
+LEITURAS = [status.value for status in StatusLeitura]
+STATUS = ['Vencido', 'Atenção', 'Válido'] + LEITURAS[1:]
+
+
+class CertificadoRecord(NamedTuple):
+    """
+    Registro de um arquivo .pfx produzido pela varredura. `vencimento` é um
+    datetime UTC (None se o arquivo não foi lido), `erro` é a mensagem da
+    falha de leitura e `thumbprint` (SHA-1 do certificado) identifica o
+    certificado independentemente do nome do arquivo.
+    """
+    arquivo: str
+    codigo: str
+    cliente: str
+    vencimento: Optional[datetime]
+    status: StatusLeitura
+    erro: Optional[str]
+    thumbprint: Optional[str]
+
+
+def _hash_conteudo(pfx_data: bytes) -> str:
+    """Retorna o hash SHA-256 (hex) do conteúdo de um arquivo."""
+    return hashlib.sha256(pfx_data).hexdigest()
+
+
+def _decodificar(
+    pfx_data: bytes,
+    senhas: List[str]
+) -> Tuple[Optional[datetime], Optional[str], Optional[str], Optional[str]]:
+    """
+    Decifra o conteúdo de um arquivo .pfx tentando as senhas em ordem e
+    retorna a tupla (vencimento, thumbprint, erro, senha usada). O thumbprint
+    é o SHA-1 do certificado em hexadecimal maiúsculo, como exibido pelo
+    Windows. Em caso de falha, o erro é o da primeira senha.
+    Executada nos processos do pool, por isso nunca propaga exceções.
+    """
+    primeiro_erro = None
+    
+    for senha in senhas:
+        try:
+            certificado = pfx_reader.ler_certificado_pfx(pfx_data, senha)
+            thumbprint = certificado.fingerprint(hashes.SHA1()).hex().upper()
+            return certificado.not_valid_after_utc, thumbprint, None, senha
+        except Exception as e:
+            if primeiro_erro is None:
+                primeiro_erro = str(e) or type(e).__name__
+    
+    return None, None, primeiro_erro, None
+
+
+def _ler_conteudos(
+    caminho_pasta: str,
+    arquivos: List[str],
+    prazo: float
+) -> Iterator[Tuple[str, Optional[bytes], Optional[str], int]]:
+    """
+    Lê os arquivos em threads de E/S e gera (arquivo, conteúdo, erro, inode) à
+    medida que as leituras terminam, com até THREADS_LEITURA leituras
+    simultâneas. O inode vem do arquivo já aberto (os.fstat), sem outra
+    abertura; é 0 se o arquivo não foi lido.
+    
+    Uma leitura que passa de `prazo` segundos (arquivo ainda sendo baixado
+    da nuvem, compartilhamento travado) é abandonada e gerada com o erro
+    ERRO_TIMEOUT. A thread travada não ocupa a vaga de outra leitura e, por
+    ser daemon, não impede o encerramento do servidor.
+    
+    Threads abandonadas ainda travadas são contadas no processo (inclusive as
+    de varreduras anteriores): ao chegar a MAXIMO_LEITURAS_TRAVADAS, nenhuma
+    leitura nova é iniciada e os arquivos restantes saem com ERRO_TIMEOUT,
+    para que um compartilhamento travado não acumule uma thread por arquivo.
+    """
+    resultados: queue.Queue = queue.Queue()
+    fila = list(reversed(arquivos))
+    ativas: Dict[str, Tuple[float, threading.Thread]] = {}
+    
+    def ler(arquivo: str):
+        try:
+            with open(os.path.join(caminho_pasta, arquivo), 'rb') as f:
+                resultados.put((arquivo, f.read(), None, os.fstat(f.fileno()).st_ino))
+        except Exception as e:
+            resultados.put((arquivo, None, str(e) or type(e).__name__, 0))
+    
+    while fila or ativas:
+        # Vagas limitadas para que, mesmo se todas as ativas travarem, o
+        # total de threads abandonadas não passe de MAXIMO_LEITURAS_TRAVADAS
+        vagas = THREADS_LEITURA
+        if fila:
+            vagas = min(vagas, MAXIMO_LEITURAS_TRAVADAS - _contar_leituras_travadas())
+        while fila and len(ativas) < vagas:
+            arquivo = fila.pop()
+            thread = threading.Thread(target=ler, args=(arquivo,), name="leitura-pfx", daemon=True)
+            ativas[arquivo] = (time.monotonic(), thread)
+            thread.start()
+        
+        if not ativas:
+            while fila:
+                yield fila.pop(), None, ERRO_TIMEOUT, 0
+            return
+        
+        agora = time.monotonic()
+        espera = max(0.0, min(inicio for inicio, _ in ativas.values()) + prazo - agora)
+        try:
+            arquivo, conteudo, erro, inode = resultados.get(timeout=espera)
+        except queue.Empty:
+            pass
+        else:
+            # Resultados de leituras já abandonadas são descartados
+            if ativas.pop(arquivo, None) is not None:
+                yield arquivo, conteudo, erro, inode
+        
+        agora = time.monotonic()
+        for arquivo, (inicio, thread) in list(ativas.items()):
+            if agora - inicio >= prazo:
+                del ativas[arquivo]
+                with _travadas_lock:
+                    _leituras_travadas.add(thread)
+                yield arquivo, None, ERRO_TIMEOUT, 0
+
+
+def _contar_leituras_travadas() -> int:
+    """Quantidade de threads de leitura abandonadas que ainda não terminaram."""
+    with _travadas_lock:
+        for thread in [t for t in _leituras_travadas if not t.is_alive()]:
+            _leituras_travadas.discard(thread)
+        return len(_leituras_travadas)
+
+
+def get_numero_processos(configurado: Optional[str] = None) -> int:
+    """
+    Retorna a quantidade de processos para a leitura dos certificados.
+    O valor "0" (ou inválido) usa todos os núcleos disponíveis.
+    """
+    if configurado is None:
+        configurado = db.get_configuracao("processos_leitura") or "0"
+    
+    try:
+        processos = int(configurado)
+    except ValueError:
+        processos = 0
+    
+    if processos <= 0:
+        processos = os.cpu_count() or 1
+    return processos
+
+
+def get_senhas_alternativas(configurado: Optional[str] = None) -> List[str]:
+    """
+    Retorna as senhas alternativas (uma por linha na configuração, codificada),
+    tentadas quando a senha do nome do arquivo não abre o certificado.
+    """
+    if configurado is None:
+        configurado = db.get_configuracao("senhas_alternativas") or ""
+    
+    senhas = (linha.strip() for linha in db.decode_senha(configurado).splitlines())
+    return list(dict.fromkeys(senha for senha in senhas if senha))
+
+
+def get_prazo_leitura(configurado: Optional[str] = None) -> float:
+    """
+    Retorna o prazo, em segundos, para a leitura de cada arquivo .pfx.
+    Valores inválidos ou não positivos usam PRAZO_LEITURA_PADRAO.
+    """
+    if configurado is None:
+        configurado = db.get_configuracao("prazo_leitura") or ""
+    
+    try:
+        prazo = float(configurado)
+    except ValueError:
+        prazo = 0.0
+    
+    if prazo <= 0:
+        prazo = PRAZO_LEITURA_PADRAO
+    return prazo
+
+
+def extrair_dados_nome_arquivo(nome_arquivo: str) -> Optional[dict]:
+    """Extrai código, nome do cliente e senha do nome do arquivo .pfx."""
+    padrao = r'^(\d+)\s*-\s*(.+?)\s+Senha\s+(.+?)\.pfx$'
+    match = re.match(padrao, nome_arquivo, re.IGNORECASE)
+    
+    if match:
+        return {
+            'codigo': match.group(1).strip(),
+            'cliente': match.group(2).strip(),
+            'senha': match.group(3).strip()
+        }
+    return None
+
+
+def calcular_status(dias_para_vencer: int) -> str:
+    """Calcula o status do certificado baseado nos dias para vencer."""
+    if dias_para_vencer < 0:
+        return 'Vencido'
+    elif dias_para_vencer <= DIAS_ATENCAO:
+        return 'Atenção'
+    else:
+        return 'Válido'
+
+
+# ==================== ÍNDICE DA PASTA ====================
+
+class EntradaIndice(NamedTuple):
+    """Metadados de um arquivo .pfx obtidos na listagem da pasta."""
+    nome: str
+    tamanho: int
+    mtime_ns: int
+    inode: int
+
+
+class DiferencasIndice(NamedTuple):
+    """Diferenças entre o índice atual da pasta e o da varredura anterior."""
+    adicionados: List[str]
+    modificados: List[str]
+    removidos: List[str]
+    # Nome novo -> nome antigo (mesmo conteúdo)
+    renomeados: Dict[str, str]
+    inalterados: List[str]
+
+
+def indexar_pasta(caminho_pasta: str) -> Tuple[Dict[str, EntradaIndice], Dict[str, str]]:
+    """
+    Indexa os arquivos .pfx de uma pasta com os metadados do os.scandir
+    (tamanho, st_mtime_ns e inode), sem abrir os arquivos. Retorna o índice e
+    os arquivos cujos metadados não puderam ser lidos (nome -> erro de E/S).
+    
+    Levanta OSError se a pasta não puder ser listada (ex.: unidade de rede
+    ainda não montada): tratada como vazia, ela apagaria o cache de leituras.
+    
+    No Windows, o st_ino de DirEntry.stat() é sempre 0 (buscar o
+    identificador real abriria cada arquivo): o inode é obtido depois, só
+    para os candidatos a renomeação (calcular_diferencas) e ao ler o arquivo.
+    """
+    indice = {}
+    ilegiveis = {}
+    
+    with os.scandir(caminho_pasta) as entradas:
+        for entrada in entradas:
+            if not entrada.name.lower().endswith('.pfx'):
+                continue
+            try:
+                if not entrada.is_file():
+                    continue
+                info = entrada.stat()
+            except OSError as e:
+                ilegiveis[entrada.name] = str(e) or type(e).__name__
+                continue
+            indice[entrada.name] = EntradaIndice(
+                entrada.name, info.st_size, info.st_mtime_ns, info.st_ino
+            )
+    
+    return indice, ilegiveis
+
+
+def _obter_inode(caminho_pasta: str, arquivo: str) -> int:
+    """Identificador do arquivo pelo os.stat (real também no Windows); 0 se não puder ser lido."""
+    try:
+        return os.stat(os.path.join(caminho_pasta, arquivo)).st_ino
+    except OSError:
+        return 0
+
+
+def calcular_diferencas(
+    caminho_pasta: str,
+    indice: Dict[str, EntradaIndice],
+    anterior: Dict[str, Dict[str, Any]],
+    prazo: float = PRAZO_LEITURA_PADRAO
+) -> DiferencasIndice:
+    """
+    Compara o índice atual da pasta com as leituras da varredura anterior
+    (cache de leituras).
+    
+    Um arquivo novo é considerado renomeado quando um arquivo removido tinha
+    o mesmo inode, tamanho e st_mtime_ns, ou o mesmo tamanho e o mesmo hash
+    de conteúdo. Só os candidatos de mesmo tamanho têm o conteúdo lido.
+    O inode de um candidato listado sem ele (0, no Windows) é buscado aqui e
+    gravado no índice. Se continuar 0 (sistema de arquivos sem
+    identificador), só o hash do conteúdo confirma a renomeação, pois
+    arquivos diferentes copiados em lote podem ter o mesmo tamanho e
+    st_mtime_ns.
+    """
+    adicionados, modificados, inalterados = [], [], []
+    
+    for nome, entrada in indice.items():
+        registro = anterior.get(nome)
+        if registro is None:
+            adicionados.append(nome)
+        elif (registro['tamanho'] == entrada.tamanho
+                and registro['mtime_ns'] == entrada.mtime_ns):
+            inalterados.append(nome)
+        else:
+            modificados.append(nome)
+    
+    removidos = [nome for nome in anterior if nome not in indice]
+    renomeados = {}
+    
+    if adicionados and removidos:
+        por_tamanho: Dict[int, List[str]] = {}
+        for nome in removidos:
+            por_tamanho.setdefault(anterior[nome]['tamanho'], []).append(nome)
+        
+        for nome in adicionados:
+            entrada = indice[nome]
+            candidatos = por_tamanho.get(entrada.tamanho)
+            if not candidatos:
+                continue
+            
+            if not entrada.inode:
+                entrada = indice[nome] = entrada._replace(inode=_obter_inode(caminho_pasta, nome))
+            origem = next((
+                antigo for antigo in candidatos
+                if entrada.inode
+                and anterior[antigo]['inode'] == entrada.inode
+                and anterior[antigo]['mtime_ns'] == entrada.mtime_ns
+            ), None)
+            
+            if origem is None and any(anterior[antigo]['hash_conteudo'] for antigo in candidatos):
+                _, conteudo, _, _ = next(_ler_conteudos(caminho_pasta, [nome], prazo))
+                if conteudo is None:
+                    continue
+                hash_conteudo = _hash_conteudo(conteudo)
+                origem = next((
+                    antigo for antigo in candidatos
+                    if anterior[antigo]['hash_conteudo'] == hash_conteudo
+                ), None)
+            
+            if origem is not None:
+                renomeados[nome] = origem
+                candidatos.remove(origem)
+        
+        adicionados = [nome for nome in adicionados if nome not in renomeados]
+        removidos = [nome for nome in removidos if nome not in renomeados.values()]
+    
+    return DiferencasIndice(adicionados, modificados, removidos, renomeados, inalterados)
+
+
+# Resultado de um arquivo decifrado: (arquivo, vencimento, thumbprint, erro, hash do conteúdo, senha usada)
+Decifrado = Tuple[str, Optional[datetime], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def _senha_da_leitura(arquivo: str, leitura: Dict[str, Any]) -> Optional[str]:
+    """Senha que abriu o arquivo em uma leitura do cache: a lembrada ou a do nome."""
+    lembrada = db.decode_senha(leitura['senha_alternativa'] or "")
+    if lembrada:
+        return lembrada
+    dados = extrair_dados_nome_arquivo(arquivo)
+    return dados['senha'] if dados else None
+
+
+class _DecifradorPorConteudo:
+    """
+    Decifra os arquivos lidos, uma única vez por conteúdo (hash SHA-256), no
+    pool de processos ou, com poucos arquivos, na thread atual.
+    
+    Uma cópia de um conteúdo já decifrado com sucesso reaproveita o resultado
+    se a senha que abriu o conteúdo estiver entre as senhas da cópia. Se não
+    estiver (ex.: a senha no nome da cópia está errada), a cópia é decifrada
+    com as próprias senhas e falha como falharia sozinha. Cópias de um
+    conteúdo ainda em decifração aguardam o resultado; se ele falhar, cada
+    cópia é decifrada com as próprias senhas.
+    
+    `enviar`, `concluidos` e `aguardar` retornam os resultados prontos
+    (Decifrado), inclusive os das cópias liberadas por eles.
+    """
+    
+    def __init__(
+        self,
+        senhas: Dict[str, List[str]],
+        conhecidos: Dict[str, Tuple[datetime, str, Optional[str]]],
+        processos: int
+    ):
+        # Senhas a tentar por arquivo (candidatas, em ordem)
+        self.senhas = senhas
+        # Conteúdos já decifrados com sucesso: hash -> (vencimento, thumbprint, senha)
+        self.conhecidos = conhecidos
+        # Conteúdos em decifração -> cópias que aguardam o resultado (arquivo, conteúdo)
+        self.aguardando: Dict[str, List[Tuple[str, bytes]]] = {}
+        # Decifrações no pool -> (arquivo, hash do conteúdo)
+        self.futuros: Dict[Future, Tuple[str, str]] = {}
+        
+        self.executor = None
+        if processos > 1 and len(senhas) >= MINIMO_ARQUIVOS_PARALELO:
+            self.executor = ProcessPoolExecutor(max_workers=min(processos, len(senhas)))
+    
+    @property
+    def em_andamento(self) -> bool:
+        """Indica se ainda há decifrações no pool."""
+        return bool(self.futuros)
+    
+    def enviar(self, arquivo: str, conteudo: bytes) -> List[Decifrado]:
+        """Envia o conteúdo lido de um arquivo e retorna os resultados já prontos."""
+        prontos: List[Decifrado] = []
+        fila = [(arquivo, conteudo)]
+        
+        while fila:
+            arquivo, conteudo = fila.pop()
+            hash_conteudo = _hash_conteudo(conteudo)
+            conhecido = self.conhecidos.get(hash_conteudo)
+            
+            if conhecido is not None and conhecido[2] in self.senhas[arquivo]:
+                vencimento, thumbprint, senha = conhecido
+                prontos.append((arquivo, vencimento, thumbprint, None, hash_conteudo, senha))
+            elif hash_conteudo in self.aguardando:
+                self.aguardando[hash_conteudo].append((arquivo, conteudo))
+            elif self.executor is None:
+                self.aguardando[hash_conteudo] = []
+                resultado = _decodificar(conteudo, self.senhas[arquivo])
+                fila.extend(self._concluir(arquivo, hash_conteudo, resultado, prontos))
+            else:
+                self.aguardando[hash_conteudo] = []
+                futuro = self.executor.submit(_decodificar, conteudo, self.senhas[arquivo])
+                self.futuros[futuro] = (arquivo, hash_conteudo)
+        
+        return prontos
+    
+    def concluidos(self) -> List[Decifrado]:
+        """Resultados das decifrações do pool que já terminaram, sem esperar."""
+        return self._coletar([futuro for futuro in self.futuros if futuro.done()])
+    
+    def aguardar(self) -> List[Decifrado]:
+        """Espera ao menos uma decifração do pool terminar e retorna os resultados prontos."""
+        prontos, _ = wait(list(self.futuros), return_when=FIRST_COMPLETED)
+        return self._coletar(prontos)
+    
+    def encerrar(self):
+        """Cancela as decifrações que não começaram e encerra o pool."""
+        if self.executor is None:
+            return
+        # Cancela à mão o que não começou (cancel_futures do shutdown requer Python 3.9)
+        for futuro in self.futuros:
+            futuro.cancel()
+        self.executor.shutdown(wait=True)
+    
+    def _coletar(self, futuros: Iterable[Future]) -> List[Decifrado]:
+        prontos: List[Decifrado] = []
+        for futuro in futuros:
+            arquivo, hash_conteudo = self.futuros.pop(futuro)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # Processo do pool encerrado de forma inesperada
+                resultado = (None, None, str(e) or type(e).__name__, None)
+            
+            # Cópias liberadas podem enviar novos trabalhos ao pool
+            for copia, conteudo in self._concluir(arquivo, hash_conteudo, resultado, prontos):
+                prontos.extend(self.enviar(copia, conteudo))
+        return prontos
+    
+    def _concluir(
+        self,
+        arquivo: str,
+        hash_conteudo: str,
+        resultado: Tuple[Optional[datetime], Optional[str], Optional[str], Optional[str]],
+        prontos: List[Decifrado]
+    ) -> List[Tuple[str, bytes]]:
+        """Registra a decifração de um conteúdo e retorna as cópias que aguardavam por ela."""
+        data_vencimento, thumbprint, erro, senha = resultado
+        prontos.append((arquivo, data_vencimento, thumbprint, erro, hash_conteudo, senha))
+        if data_vencimento is not None:
+            self.conhecidos[hash_conteudo] = (data_vencimento, thumbprint, senha)
+        return self.aguardando.pop(hash_conteudo, [])
+
+
+def _ler_vencimentos(
+    caminho_pasta: str,
+    indice: Dict[str, EntradaIndice],
+    senhas: Dict[str, str],
+    processos: int,
+    prazo: float = PRAZO_LEITURA_PADRAO,
+    cancelar: Optional[Callable[[], bool]] = None,
+    senhas_alternativas: Optional[List[str]] = None,
+    parcial: bool = False,
+    preservar: Iterable[str] = ()
+) -> Iterator[Tuple[str, Optional[datetime], Optional[str], StatusLeitura, Optional[str]]]:
+    """
+    Gera (arquivo, vencimento, thumbprint, status, erro) para cada arquivo do índice,
+    à medida que as leituras terminam. `senhas` traz a senha de cada arquivo do índice.
+    
+    O índice é comparado com a varredura anterior (calcular_diferencas).
+    Arquivos inalterados saem primeiro, direto do cache, sem abrir o arquivo;
+    arquivos renomeados reaproveitam a leitura do nome antigo se ela teve
+    sucesso. Só os adicionados e modificados são lidos (threads de E/S, com
+    `prazo` segundos por arquivo), descriptografados no pool de processos
+    (ou na thread atual) e gravados no cache ao final, mesmo se a varredura
+    for cancelada ou o gerador for fechado antes do fim. Arquivos que não
+    foram lidos no prazo ou cuja leitura falhou (erro de E/S, ex.: arquivo
+    ainda sendo baixado do Drive) saem com STATUS_TIMEOUT e ficam fora do
+    cache, para serem lidos na próxima varredura.
+    
+    Falhas de descriptografia ficam no cache (cache negativo): o arquivo só
+    é tentado de novo quando mudar (tamanho ou st_mtime_ns), for renomeado
+    ou o cache de erros for limpo. Cada arquivo pendente é aberto com a senha
+    lembrada para ele, a senha do nome e as `senhas_alternativas`, nesta
+    ordem; uma senha que não seja a do nome e funcione é lembrada no cache.
+    
+    Cópias idênticas (mesmo hash do conteúdo) são decifradas uma única vez
+    (_DecifradorPorConteudo), reaproveitando uma leitura com sucesso do cache
+    ou desta varredura, desde que a senha que abriu o conteúdo esteja entre
+    as senhas da cópia. Um arquivo renomeado segue a mesma regra.
+    
+    As leituras novas são gravadas em lotes de TAMANHO_LOTE_CHECKPOINT junto
+    com o progresso da varredura (tabela varreduras). Se o processo morrer no
+    meio, a próxima varredura encontra esses arquivos no cache e continua a
+    partir deles.
+    
+    Com `parcial`, o índice é só uma parte da pasta (lote da fila de
+    varredura): as leituras vão para o cache sem tocar no progresso da
+    varredura da pasta nem no cache dos arquivos fora do índice.
+    
+    Os arquivos em `preservar` (fora do índice porque os metadados não foram
+    lidos) não são comparados nem removidos do cache.
+    """
+    preservados = set(preservar)
+    cache = db.get_cache_leituras(caminho_pasta)
+    if parcial or preservados:
+        cache = {
+            arquivo: linha for arquivo, linha in cache.items()
+            if arquivo not in preservados and (not parcial or arquivo in indice)
+        }
+    diferencas = calcular_diferencas(caminho_pasta, indice, cache, prazo)
+    if not parcial:
+        db.iniciar_varredura(caminho_pasta, len(indice))
+    processados = 0
+    lote = []
+    
+    def gravar():
+        nonlocal lote
+        if parcial:
+            db.salvar_cache_leituras(caminho_pasta, lote)
+        else:
+            db.salvar_checkpoint_varredura(caminho_pasta, lote, processados)
+        lote = []
+    
+    def decodificado(
+        arquivo: str,
+        data_vencimento: Optional[datetime],
+        thumbprint: Optional[str],
+        erro: Optional[str],
+        hash_conteudo: Optional[str],
+        senha: Optional[str]
+    ) -> Tuple[str, Optional[datetime], Optional[str], StatusLeitura, Optional[str]]:
+        """Registra a leitura de um arquivo para o cache e retorna a tupla gerada."""
+        nonlocal processados
+        entrada = indice[arquivo]
+        status = StatusLeitura.OK if data_vencimento else StatusLeitura.ERRO_LEITURA
+        processados += 1
+        lote.append({
+            'arquivo': arquivo,
+            'tamanho': entrada.tamanho,
+            'mtime_ns': entrada.mtime_ns,
+            'inode': entrada.inode,
+            'hash_conteudo': hash_conteudo,
+            'thumbprint': thumbprint,
+            'senha_alternativa': db.encode_senha(senha) if senha and senha != senhas[arquivo] else None,
+            'vencimento': data_vencimento.isoformat() if data_vencimento else None,
+            'status': status.value,
+            'erro': erro
+        })
+        if len(lote) >= TAMANHO_LOTE_CHECKPOINT:
+            gravar()
+        return arquivo, data_vencimento, thumbprint, status, erro
+    
+    def candidatas(arquivo: str, anterior: Optional[Dict[str, Any]]) -> List[str]:
+        """Senhas a tentar, sem repetição: a lembrada, a do nome e as alternativas."""
+        lembrada = db.decode_senha(anterior['senha_alternativa'] or "") if anterior else ""
+        return list(dict.fromkeys(
+            senha for senha in [lembrada, senhas[arquivo], *(senhas_alternativas or [])] if senha
+        ))
+    
+    pendentes = [
+        (arquivo, candidatas(arquivo, cache.get(arquivo)))
+        for arquivo in diferencas.adicionados + diferencas.modificados
+    ]
+    
+    for arquivo in diferencas.inalterados:
+        em_cache = cache[arquivo]
+        if em_cache['status'] == 'OK' and not em_cache['thumbprint']:
+            # Lido antes de o cache guardar o thumbprint: lê de novo uma única vez
+            pendentes.append((arquivo, candidatas(arquivo, em_cache)))
+            continue
+        
+        vencimento = em_cache['vencimento']
+        processados += 1
+        yield (arquivo, datetime.fromisoformat(vencimento) if vencimento else None,
+               em_cache['thumbprint'], StatusLeitura(em_cache['status']), em_cache['erro'])
+    
+    for arquivo, antigo in diferencas.renomeados.items():
+        em_cache = cache[antigo]
+        senha = _senha_da_leitura(antigo, em_cache)
+        if em_cache['status'] != 'OK' or not em_cache['thumbprint'] or senha not in candidatas(arquivo, em_cache):
+            # A leitura falhou com o nome antigo, ou a senha que abriu o arquivo
+            # não é a do novo nome: lê de novo com as senhas do novo nome
+            pendentes.append((arquivo, candidatas(arquivo, em_cache)))
+            continue
+        
+        yield decodificado(arquivo, datetime.fromisoformat(em_cache['vencimento']),
+                           em_cache['thumbprint'], None, em_cache['hash_conteudo'], senha)
+    
+    decifrador = _DecifradorPorConteudo(dict(pendentes), {
+        linha['hash_conteudo']: (
+            datetime.fromisoformat(linha['vencimento']), linha['thumbprint'], _senha_da_leitura(arquivo, linha)
+        )
+        for arquivo, linha in cache.items()
+        if linha['status'] == 'OK' and linha['hash_conteudo'] and linha['thumbprint']
+    }, processos)
+    
+    conteudos = _ler_conteudos(caminho_pasta, [arquivo for arquivo, _ in pendentes], prazo)
+    concluida = False
+    try:
+        for arquivo, conteudo, erro, inode in conteudos:
+            if cancelar and cancelar():
+                break
+            
+            if inode and not indice[arquivo].inode:
+                # Inode não informado na listagem (Windows): gravado no cache
+                indice[arquivo] = indice[arquivo]._replace(inode=inode)
+            
+            if conteudo is None:
+                # Prazo esgotado ou erro de E/S: fora do cache, tentado de novo
+                processados += 1
+                yield arquivo, None, None, StatusLeitura.TIMEOUT, erro
+                continue
+            
+            for resultado in decifrador.enviar(arquivo, conteudo) + decifrador.concluidos():
+                yield decodificado(*resultado)
+        else:
+            while decifrador.em_andamento and not (cancelar and cancelar()):
+                for resultado in decifrador.aguardar():
+                    yield decodificado(*resultado)
+            concluida = not decifrador.em_andamento
+    finally:
+        conteudos.close()
+        decifrador.encerrar()
+        gravar()
+        if concluida and not parcial:
+            db.concluir_varredura(caminho_pasta, processados)
+            db.remover_cache_ausentes(caminho_pasta, [*indice, *preservados])
+
+
+def varrer_certificados(
+    caminho_pasta: str,
+    processos: Optional[int] = None,
+    progresso: Optional[Callable[[int, int, str], None]] = None,
+    cancelar: Optional[Callable[[], bool]] = None,
+    prazo: Optional[float] = None,
+    senhas_alternativas: Optional[List[str]] = None
+) -> Iterator[CertificadoRecord]:
+    """
+    Motor de varredura: gera um CertificadoRecord por arquivo .pfx da pasta,
+    à medida que cada arquivo é processado (a ordem não é a da listagem).
+    
+    `progresso(feitos, total, arquivo)` é chamado após cada registro e a
+    varredura para assim que `cancelar()` retornar True. `prazo` é o limite,
+    em segundos, para a leitura de cada arquivo e `senhas_alternativas` as
+    senhas tentadas quando a do nome não abre o arquivo (padrão: as da
+    configuração).
+    
+    Ao fim de uma varredura completa, os certificados lidos são gravados na
+    tabela certificados (consultas do dashboard por vencimento). Arquivos
+    cujos metadados não puderam ser lidos saem com StatusLeitura.TIMEOUT e
+    mantêm a leitura anterior. Se a pasta não puder ser listada, levanta
+    OSError sem alterar o cache nem a tabela certificados.
+    """
+    if processos is None:
+        processos = get_numero_processos()
+    if prazo is None:
+        prazo = get_prazo_leitura()
+    if senhas_alternativas is None:
+        senhas_alternativas = get_senhas_alternativas()
+    
+    indice_pasta, ilegiveis = indexar_pasta(caminho_pasta)
+    total = len(indice_pasta) + len(ilegiveis)
+    feitos = 0
+    nomes = {}
+    em_timeout = []
+    
+    for arquivo in [*indice_pasta, *ilegiveis]:
+        dados_arquivo = extrair_dados_nome_arquivo(arquivo)
+        if dados_arquivo is None:
+            registro = CertificadoRecord(
+                arquivo, '?', arquivo, None, StatusLeitura.NOME_INVALIDO, ERRO_NOME_INVALIDO, None
+            )
+        elif arquivo in ilegiveis:
+            # Metadados ilegíveis (erro de E/S): não é um arquivo removido
+            em_timeout.append(arquivo)
+            registro = CertificadoRecord(
+                arquivo, dados_arquivo['codigo'], dados_arquivo['cliente'],
+                None, StatusLeitura.TIMEOUT, ilegiveis[arquivo], None
+            )
+        else:
+            nomes[arquivo] = dados_arquivo
+            continue
+        
+        feitos += 1
+        yield registro
+        if progresso:
+            progresso(feitos, total, arquivo)
+    
+    leituras = _ler_vencimentos(
+        caminho_pasta,
+        {arquivo: indice_pasta[arquivo] for arquivo in nomes},
+        {arquivo: dados['senha'] for arquivo, dados in nomes.items()},
+        processos,
+        prazo,
+        cancelar,
+        senhas_alternativas,
+        preservar=ilegiveis
+    )
+    
+    certificados = []
+    
+    for arquivo, data_vencimento, thumbprint, status, erro in leituras:
+        feitos += 1
+        dados_arquivo = nomes[arquivo]
+        registro = CertificadoRecord(
+            arquivo, dados_arquivo['codigo'], dados_arquivo['cliente'],
+            data_vencimento, status, erro, thumbprint
+        )
+        if data_vencimento is not None:
+            certificados.append(registro)
+        elif status is StatusLeitura.TIMEOUT:
+            em_timeout.append(arquivo)
+        
+        yield registro
+        if progresso:
+            progresso(feitos, total, arquivo)
+    
+    if cancelar and cancelar():
+        return
+    
+    # Arquivos em timeout mantêm os dados da leitura anterior até a próxima tentativa
+    db.salvar_certificados(caminho_pasta, certificados, em_timeout)
+
+
+def montar_base(registros: Iterable[CertificadoRecord]) -> pd.DataFrame:
+    """
+    Monta o resultado guardado de uma varredura (COLUNAS_BASE): código,
+    cliente, vencimento absoluto (datetime64 UTC, NaT se não lido) e o
+    resultado da leitura (categoria de LEITURAS). Dias para vencer e status
+    dependem da data atual e são calculados por calcular_situacao.
+    
+    As colunas são preenchidas diretamente a partir dos registros, sem
+    montar um dicionário por linha.
+    """
+    codigos, clientes, timestamps, datas, leituras = [], [], [], [], []
+    codigo_leitura = {status: i for i, status in enumerate(StatusLeitura)}
+    
+    for registro in registros:
+        data_vencimento = registro.vencimento
+        codigos.append(registro.codigo)
+        clientes.append(registro.cliente)
+        leituras.append(codigo_leitura[registro.status])
+        if data_vencimento is None:
+            timestamps.append(np.nan)
+            datas.append(None)
+        else:
+            timestamps.append(data_vencimento.timestamp())
+            datas.append(f"{data_vencimento.day:02d}/{data_vencimento.month:02d}/{data_vencimento.year}")
+    
+    # Segundos desde a época (NaN se não lido) -> datetime64[us] UTC (NaT se não lido)
+    segundos = np.array(timestamps, dtype=np.float64)
+    lidos = ~np.isnan(segundos)
+    microssegundos = np.full(len(segundos), np.datetime64('NaT'), dtype='datetime64[us]')
+    microssegundos[lidos] = np.round(segundos[lidos] * 1e6).astype(np.int64)
+    
+    return pd.DataFrame({
+        'Código': codigos,
+        'Cliente': clientes,
+        'Vencimento': pd.DatetimeIndex(microssegundos).tz_localize('UTC'),
+        'Data Vencimento': datas,
+        'Leitura': pd.Categorical.from_codes(np.array(leituras, dtype=np.int8), LEITURAS)
+    }, columns=COLUNAS_BASE)
+
+
+def calcular_situacao(base: pd.DataFrame, agora: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Monta o DataFrame exibido no dashboard (COLUNAS) a partir do resultado de
+    uma varredura, para a data atual. Dias para vencer e status são
+    recalculados a cada chamada com aritmética datetime64 do numpy, de modo
+    que a virada do dia nunca exige uma nova leitura dos certificados.
+    
+    'Dias para Vencer' é Int32 (nulo para arquivos não lidos) e 'Status' é
+    categórico (STATUS), calculado por numpy.select sobre os códigos.
+    """
+    if agora is None:
+        agora = datetime.now(timezone.utc)
+    referencia = np.datetime64(agora.astimezone(timezone.utc).replace(tzinfo=None), 'us')
+    
+    vencimentos = base['Vencimento'].dt.tz_convert(None).to_numpy(dtype='datetime64[us]')
+    lidos = ~np.isnat(vencimentos)
+    
+    # Divisão inteira arredonda para baixo, como timedelta.days
+    dias = (np.where(lidos, vencimentos, referencia) - referencia) // np.timedelta64(1, 'D')
+    
+    # Erros de leitura mantêm a posição relativa: LEITURAS[i] == STATUS[i + 2] para i >= 1
+    codigos_status = np.select(
+        [~lidos, dias < 0, dias <= DIAS_ATENCAO],
+        [base['Leitura'].cat.codes.to_numpy() + 2, 0, 1],
+        2
+    )
+    
+    df = pd.DataFrame({
+        'Código': base['Código'].array,
+        'Cliente': base['Cliente'].array,
+        'Vencimento': base['Data Vencimento'].array,
+        'Dias para Vencer': pd.arrays.IntegerArray(dias.astype(np.int32), ~lidos),
+        'Status': pd.Categorical.from_codes(codigos_status, STATUS)
+    }, columns=COLUNAS)
+    
+    # Desempata pelo código: a ordem de chegada dos registros varia entre execuções
+    df = df.sort_values(['Dias para Vencer', 'Código'], na_position='last', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def montar_dataframe(registros: Iterable[CertificadoRecord]) -> pd.DataFrame:
+    """Monta o DataFrame exibido no dashboard a partir dos registros da varredura."""
+    return calcular_situacao(montar_base(registros))
+
+
+# ==================== SNAPSHOT DA ÚLTIMA VARREDURA ====================
+
+def salvar_snapshot(caminho_pasta: str, registros: List[CertificadoRecord]) -> bool:
+    """
+    Grava os registros de uma varredura completa da pasta como snapshot
+    (tabela snapshots_varredura), para exibição imediata após reiniciar o
+    servidor. Os registros são guardados por coluna, em JSON compactado;
+    vencimentos em segundos desde a época e status pelo índice em LEITURAS.
+    """
+    codigo_status = {status: i for i, status in enumerate(StatusLeitura)}
+    colunas = {
+        'arquivo': [r.arquivo for r in registros],
+        'codigo': [r.codigo for r in registros],
+        'cliente': [r.cliente for r in registros],
+        'vencimento': [r.vencimento.timestamp() if r.vencimento else None for r in registros],
+        'status': [codigo_status[r.status] for r in registros],
+        'erro': [r.erro for r in registros],
+        'thumbprint': [r.thumbprint for r in registros],
+    }
+    dados = zlib.compress(json.dumps(colunas, ensure_ascii=False).encode('utf-8'))
+    return db.salvar_snapshot_varredura(caminho_pasta, len(registros), dados)
+
+
+def carregar_snapshot(caminho_pasta: str) -> Optional[Tuple[List[CertificadoRecord], datetime]]:
+    """
+    Retorna os registros do snapshot da pasta e quando ele foi salvo (hora
+    local), ou None se não houver snapshot ou ele não puder ser lido.
+    """
+    snapshot = db.get_snapshot_varredura(caminho_pasta)
+    if snapshot is None:
+        return None
+    
+    try:
+        colunas = json.loads(zlib.decompress(snapshot['dados']).decode('utf-8'))
+        status = list(StatusLeitura)
+        registros = [
+            CertificadoRecord(
+                arquivo, codigo, cliente,
+                datetime.fromtimestamp(vencimento, timezone.utc) if vencimento is not None else None,
+                status[indice_status], erro, thumbprint
+            )
+            for arquivo, codigo, cliente, vencimento, indice_status, erro, thumbprint in zip(
+                colunas['arquivo'], colunas['codigo'], colunas['cliente'], colunas['vencimento'],
+                colunas['status'], colunas['erro'], colunas['thumbprint']
+            )
+        ]
+    except (zlib.error, ValueError, KeyError, IndexError, TypeError):
+        return None
+    
+    return registros, datetime.fromisoformat(snapshot['salvo_em'])
+
+
+# ==================== SERVIÇO DE VARREDURA COMPARTILHADO ====================
+
+class Varredura:
+    """Estado de uma varredura de pasta, compartilhado entre as sessões."""
+    
+    def __init__(self, caminho_pasta: str):
+        self.caminho_pasta = caminho_pasta
+        self.feitos = 0
+        self.total = 0
+        self.arquivo_atual = ""
+        # Registros da varredura e resultado (montar_base): só vencimentos absolutos
+        self.registros: List[CertificadoRecord] = []
+        self.resultado: Optional[pd.DataFrame] = None
+        self.erro: Optional[BaseException] = None
+        self.iniciada_em = time.time()
+        self.concluida_em: Optional[float] = None
+        self.concluida = threading.Event()
+        # Arquivos já lidos por uma varredura anterior interrompida (checkpoint)
+        self.retomada_de = 0
+        # Arquivos que não foram lidos dentro do prazo
+        self.timeouts = 0
+        # Resultado restaurado do snapshot salvo (não lido nesta execução do servidor)
+        self.do_snapshot = False
+    
+    def atualizar(self, feitos: int, total: int, arquivo: str):
+        self.feitos = feitos
+        self.total = total
+        self.arquivo_atual = arquivo
+
+
+class ServicoVarredura:
+    """
+    Serviço de varredura único por processo (single-flight).
+    
+    As varreduras rodam em threads de fundo do próprio serviço, desacopladas
+    das execuções do Streamlit: uma nova execução da página nunca interrompe
+    nem descarta trabalho já feito. Só uma varredura por pasta executa de cada
+    vez; quem pede a mesma pasta acompanha a varredura em andamento.
+    
+    Se arquivos não forem lidos no prazo (STATUS_TIMEOUT), uma nova varredura
+    da pasta é agendada em segundo plano; ela só lê esses arquivos, pois os
+    demais já estão no cache.
+    
+    Cada varredura concluída é salva como snapshot (salvar_snapshot). Após
+    reiniciar o servidor, `restaurar` oferece esse snapshot como última
+    varredura enquanto a pasta é lida de novo.
+    """
+    
+    # Espera, em segundos, antes de repetir a leitura dos arquivos em timeout
+    INTERVALO_NOVA_TENTATIVA = 60.0
+    
+    # Novas tentativas automáticas seguidas por pasta
+    MAXIMO_NOVAS_TENTATIVAS = 5
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[str, Varredura] = {}
+        self._resultados: Dict[str, Varredura] = {}
+        self._falhas: Dict[str, Varredura] = {}
+        self._tentativas: Dict[str, int] = {}
+    
+    def iniciar(self, caminho_pasta: str) -> Varredura:
+        """
+        Inicia uma varredura da pasta em segundo plano e retorna seu estado.
+        Se já houver uma varredura da pasta em andamento, retorna essa.
+        O resultado anterior continua disponível até a nova terminar.
+        """
+        with self._lock:
+            varredura = self._em_andamento.get(caminho_pasta)
+            if varredura is not None:
+                return varredura
+            
+            varredura = Varredura(caminho_pasta)
+            self._em_andamento[caminho_pasta] = varredura
+        
+        checkpoint = db.get_varredura(caminho_pasta)
+        if checkpoint and not checkpoint['concluida_em']:
+            varredura.retomada_de = checkpoint['processados'] or 0
+        
+        threading.Thread(
+            target=self._executar,
+            args=(varredura,),
+            name=f"varredura-{os.path.basename(caminho_pasta)}",
+            daemon=True
+        ).start()
+        return varredura
+    
+    def restaurar(self, caminho_pasta: str) -> Optional[Varredura]:
+        """
+        Usa o snapshot salvo como última varredura da pasta, se ainda não houver
+        uma nesta execução do servidor. Retorna a última varredura da pasta ou
+        None se não houver snapshot. Não inicia a nova leitura da pasta.
+        """
+        concluida = self.ultima(caminho_pasta)
+        if concluida is not None:
+            return concluida
+        
+        snapshot = carregar_snapshot(caminho_pasta)
+        if snapshot is None:
+            return None
+        
+        registros, salvo_em = snapshot
+        varredura = Varredura(caminho_pasta)
+        varredura.registros = registros
+        varredura.resultado = montar_base(registros)
+        varredura.total = varredura.feitos = len(registros)
+        varredura.timeouts = sum(1 for r in registros if r.status is StatusLeitura.TIMEOUT)
+        varredura.concluida_em = salvo_em.timestamp()
+        varredura.do_snapshot = True
+        varredura.concluida.set()
+        
+        with self._lock:
+            return self._resultados.setdefault(caminho_pasta, varredura)
+    
+    def em_andamento(self, caminho_pasta: str) -> Optional[Varredura]:
+        """Retorna a varredura da pasta em andamento, se houver."""
+        with self._lock:
+            return self._em_andamento.get(caminho_pasta)
+    
+    def ultima(self, caminho_pasta: str) -> Optional[Varredura]:
+        """Retorna a última varredura concluída com sucesso da pasta."""
+        with self._lock:
+            return self._resultados.get(caminho_pasta)
+    
+    def falha(self, caminho_pasta: str) -> Optional[Varredura]:
+        """Retorna a última varredura que falhou, se nenhuma outra a sucedeu."""
+        with self._lock:
+            return self._falhas.get(caminho_pasta)
+    
+    def _executar(self, varredura: Varredura):
+        try:
+            varredura.registros = list(
+                varrer_certificados(varredura.caminho_pasta, progresso=varredura.atualizar)
+            )
+            varredura.resultado = montar_base(varredura.registros)
+            varredura.timeouts = int((varredura.resultado['Leitura'] == STATUS_TIMEOUT).sum())
+            salvar_snapshot(varredura.caminho_pasta, varredura.registros)
+        except Exception as e:
+            varredura.erro = e
+        finally:
+            varredura.concluida_em = time.time()
+            nova_tentativa = False
+            with self._lock:
+                del self._em_andamento[varredura.caminho_pasta]
+                if varredura.erro is None:
+                    self._resultados[varredura.caminho_pasta] = varredura
+                    self._falhas.pop(varredura.caminho_pasta, None)
+                else:
+                    self._falhas[varredura.caminho_pasta] = varredura
+                
+                tentativas = self._tentativas.pop(varredura.caminho_pasta, 0)
+                if varredura.timeouts and tentativas < self.MAXIMO_NOVAS_TENTATIVAS:
+                    self._tentativas[varredura.caminho_pasta] = tentativas + 1
+                    nova_tentativa = True
+            varredura.concluida.set()
+            
+            if nova_tentativa:
+                agendamento = threading.Timer(
+                    self.INTERVALO_NOVA_TENTATIVA, self.iniciar, args=(varredura.caminho_pasta,)
+                )
+                agendamento.daemon = True
+                agendamento.start()
+
+
+_servico_varredura: Optional[ServicoVarredura] = None
+_servico_lock = threading.Lock()
+
+
+def get_servico_varredura() -> ServicoVarredura:
+    """
+    Serviço de varredura único do processo, compartilhado por todas as sessões
+    do Streamlit e pelo aquecimento na inicialização do servidor.
+    """
+    global _servico_varredura
+    with _servico_lock:
+        if _servico_varredura is None:
+            _servico_varredura = ServicoVarredura()
+        return _servico_varredura
+
+
+def aquecer(
+    caminho_pasta: str,
+    ao_concluir: Optional[Callable[[Varredura, float], None]] = None
+) -> Optional[Varredura]:
+    """
+    Varredura de aquecimento, na inicialização do servidor: se a configuração
+    'aquecimento_inicializacao' estiver ativa, restaura o snapshot e inicia a
+    varredura da pasta no serviço do processo, para que a primeira sessão já
+    encontre o resultado pronto. Retorna a varredura iniciada ou None.
+    
+    Ao terminar, a duração (segundos) e o instante são gravados nas
+    configurações 'aquecimento_duracao' e 'aquecimento_em', e
+    `ao_concluir(varredura, duracao)` é chamado.
+    """
+    if db.get_configuracao("aquecimento_inicializacao") != "true":
+        return None
+    
+    servico = get_servico_varredura()
+    servico.restaurar(caminho_pasta)
+    varredura = servico.iniciar(caminho_pasta)
+    
+    def relatar():
+        varredura.concluida.wait()
+        duracao = varredura.concluida_em - varredura.iniciada_em
+        db.salvar_configuracoes({
+            "aquecimento_duracao": f"{duracao:.1f}",
+            "aquecimento_em": datetime.now().isoformat(timespec='seconds')
+        })
+        if ao_concluir:
+            ao_concluir(varredura, duracao)
+    
+    threading.Thread(target=relatar, name="aquecimento", daemon=True).start()
+    return varredura
+
+
+# ==================== FILA DE VARREDURA (VÁRIOS PROCESSOS) ====================
+
+# Arquivos por job da fila de varredura
+TAMANHO_LOTE_FILA = 200
+
+# Duração, em segundos, da reserva de um job; renovada enquanto o worker trabalha
+DURACAO_LEASE = 120.0
+
+# Reservas de um job (workers que morreram com ele) antes de marcá-lo como 'falhou'
+MAXIMO_TENTATIVAS_JOB = 3
+
+# Espera, em segundos, de um worker sem jobs antes de consultar a fila de novo
+INTERVALO_FILA_VAZIA = 5.0
+
+
+def indexar_arquivos(caminho_pasta: str, arquivos: List[str]) -> Dict[str, EntradaIndice]:
+    """Indexa só os arquivos informados da pasta (os que não existem mais ficam de fora)."""
+    indice = {}
+    
+    for arquivo in arquivos:
+        try:
+            info = os.stat(os.path.join(caminho_pasta, arquivo))
+        except OSError:
+            continue
+        indice[arquivo] = EntradaIndice(arquivo, info.st_size, info.st_mtime_ns, info.st_ino)
+    
+    return indice
+
+
+def distribuir_varredura(caminho_pasta: str, tamanho_lote: int = TAMANHO_LOTE_FILA) -> int:
+    """
+    Coordenador da fila de varredura: indexa a pasta, compara com o cache e
+    divide os arquivos a ler (novos e modificados, com nome válido) em jobs
+    de até `tamanho_lote` arquivos na tabela scan_jobs. Retorna a quantidade
+    de jobs criados.
+    
+    Qualquer quantidade de workers (executar_worker), no mesmo computador ou
+    em outros que compartilhem a pasta e o banco, lê os lotes; o último a
+    terminar consolida o resultado da pasta (consolidar_varredura).
+    """
+    indice = {
+        arquivo: entrada for arquivo, entrada in indexar_pasta(caminho_pasta)[0].items()
+        if extrair_dados_nome_arquivo(arquivo) is not None
+    }
+    diferencas = calcular_diferencas(
+        caminho_pasta, indice, db.get_cache_leituras(caminho_pasta), get_prazo_leitura()
+    )
+    
+    arquivos = sorted(diferencas.adicionados + diferencas.modificados)
+    lotes = [arquivos[i:i + tamanho_lote] for i in range(0, len(arquivos), tamanho_lote)]
+    db.criar_jobs_varredura(caminho_pasta, lotes)
+    return len(lotes)
+
+
+def consolidar_varredura(caminho_pasta: str) -> List[CertificadoRecord]:
+    """
+    Junta os resultados gravados pelos workers no cache em uma varredura
+    completa da pasta (tabela certificados e snapshot). Os lotes já estão no
+    cache: só arquivos renomeados ou fora do prazo nos workers são abertos.
+    """
+    registros = list(varrer_certificados(caminho_pasta, processos=1))
+    salvar_snapshot(caminho_pasta, registros)
+    return registros
+
+
+def _ler_lote(caminho_pasta: str, arquivos: List[str], processos: int) -> int:
+    """Lê um lote da fila de varredura e grava as leituras no cache. Retorna quantos foram lidos."""
+    indice = indexar_arquivos(caminho_pasta, arquivos)
+    senhas = {}
+    for arquivo in list(indice):
+        dados_arquivo = extrair_dados_nome_arquivo(arquivo)
+        if dados_arquivo is None:
+            del indice[arquivo]
+        else:
+            senhas[arquivo] = dados_arquivo['senha']
+    
+    leituras = _ler_vencimentos(
+        caminho_pasta, indice, senhas, processos, get_prazo_leitura(),
+        senhas_alternativas=get_senhas_alternativas(), parcial=True
+    )
+    return sum(1 for _ in leituras)
+
+
+def executar_worker(
+    pasta: Optional[str] = None,
+    processos: int = 1,
+    aguardar: bool = False,
+    parar: Optional[threading.Event] = None,
+    ao_concluir_job: Optional[Callable[[Dict[str, Any], int], None]] = None
+) -> int:
+    """
+    Worker da fila de varredura: reserva jobs (de `pasta` ou de qualquer
+    pasta), lê os arquivos do lote e marca o job como concluído, renovando o
+    lease enquanto trabalha. Um job cujo worker morrer volta para a fila
+    quando o lease vence.
+    
+    Sem `aguardar`, termina quando a fila fica vazia; com `aguardar`,
+    consulta a fila a cada INTERVALO_FILA_VAZIA segundos até `parar` ser
+    sinalizado. Retorna a quantidade de jobs concluídos.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    parar = parar or threading.Event()
+    concluidos = 0
+    
+    while not parar.is_set():
+        job = db.reservar_job_varredura(worker, DURACAO_LEASE, MAXIMO_TENTATIVAS_JOB, pasta)
+        if job is None:
+            if not aguardar:
+                break
+            parar.wait(INTERVALO_FILA_VAZIA)
+            continue
+        
+        lido = threading.Event()
+        
+        def renovar():
+            while not lido.wait(DURACAO_LEASE / 3):
+                if not db.renovar_lease_job(job['id'], worker, DURACAO_LEASE):
+                    break
+        
+        renovacao = threading.Thread(target=renovar, name=f"lease-{job['id']}", daemon=True)
+        renovacao.start()
+        try:
+            lidos = _ler_lote(job['pasta'], job['arquivos'], processos)
+        finally:
+            lido.set()
+            renovacao.join()
+        
+        if not db.concluir_job_varredura(job['id'], worker):
+            # O lease venceu e o lote foi para outro worker; as leituras já estão no cache
+            continue
+        
+        concluidos += 1
+        if ao_concluir_job:
+            ao_concluir_job(job, lidos)
+        if not db.get_progresso_fila(job['pasta'])['restantes']:
+            consolidar_varredura(job['pasta'])
+    
+    return concluidos
@@ -0,0 +1,46 @@
+"""
+Inicia o servidor do Gerenciador de Certificados com aquecimento: a leitura
+da pasta de certificados começa junto com o processo do servidor, antes do
+primeiro acesso, e o resultado fica no serviço de varredura compartilhado
+pelas sessões (scanner.get_servico_varredura).
+
+O aquecimento pode ser desligado em Configurações > Leitura.
+
+Uso:
+    python servidor.py [opções do "streamlit run", ex.: --server.port 8502]
+"""
+
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+import scanner
+from scanner import CAMINHO_CERTIFICADOS
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+
+def relatar_aquecimento(varredura: scanner.Varredura, duracao: float):
+    """Exibe no console o resultado da varredura de aquecimento."""
+    if varredura.erro is not None:
+        print(f"Aquecimento: falha após {duracao:.1f} s: {varredura.erro}", flush=True)
+    else:
+        print(f"Aquecimento: {varredura.total} arquivo(s) lidos em {duracao:.1f} s", flush=True)
+
+
+def main():
+    if not os.path.exists(CAMINHO_CERTIFICADOS):
+        print(f"Aquecimento: pasta não encontrada: {CAMINHO_CERTIFICADOS}", flush=True)
+    elif scanner.aquecer(CAMINHO_CERTIFICADOS, relatar_aquecimento) is None:
+        print("Aquecimento desativado (Configurações > Leitura)", flush=True)
+    else:
+        print(f"Aquecimento: leitura de {CAMINHO_CERTIFICADOS} iniciada", flush=True)
+    
+    # O Streamlit roda neste mesmo processo e reaproveita o serviço já aquecido
+    sys.argv = ["streamlit", "run", os.path.join(PASTA_APP, "app.py"), *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()